@@ -0,0 +1,234 @@
+"""Rate-limited, retrying SteamGridDB client with a response cache."""
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from GameSync_Metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Responses worth asking again for after a pause
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second, `burst` at once.
+
+    pause() makes every caller wait, which is how a 429 from one worker
+    slows down all of them.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until and self.rate <= 0:
+                    return
+                if now >= self._paused_until:
+                    self._tokens = min(
+                        self.burst, self._tokens + (now - self._updated) * self.rate
+                    )
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every request for at least `seconds` from now."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            # Restart with an empty bucket so requests trickle in after the pause
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+def parse_retry_after(value):
+    """Return the seconds to wait from a Retry-After header, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class SteamGridDBClient:
+    """Shared client for the SteamGridDB API and image downloads.
+
+    Every request has a timeout and is retried with exponential backoff on
+    connection errors, timeouts, 429 and 5xx responses; a Retry-After header
+    sets the pause instead when it is longer. API requests go through a
+    token bucket, and identical API requests made at the same time from
+    different threads are sent once and share the result.
+    """
+
+    def __init__(self, api_key, cache=None, ttls=None, rate=4.0, burst=8,
+                 timeout=30.0, max_retries=4, backoff=1.0, max_backoff=60.0,
+                 pool_size=8, refresh=False):
+        self.api_key = api_key
+        self.cache = cache
+        self.ttls = ttls or {}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.refresh = refresh
+        self.rate_limiter = TokenBucket(rate, burst)
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The keep-alive session, created on first use."""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                # Size the pool so every worker thread can keep its connection open
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+        return self._session
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Return the pause before retry number `attempt` (starting at 0)."""
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        delay *= random.uniform(0.5, 1.0)  # Jitter so workers do not retry in lockstep
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    def request(self, url, headers=None, stream=False, rate_limited=True):
+        """GET a URL with retries and return the final response.
+
+        The last response is returned even if it still failed; connection
+        errors and timeouts are raised once the retries are used up.
+        """
+        for attempt in range(self.max_retries + 1):
+            if rate_limited:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.get(
+                    url, headers=headers, stream=stream, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.count('http_requests')
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"GET {url} failed ({e}); retrying in {delay:.1f}s")
+                metrics.count('retried_requests')
+                time.sleep(delay)
+                continue
+
+            metrics.count('http_requests')
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            delay = self._backoff_delay(attempt, retry_after)
+            if response.status_code == 429:
+                metrics.count('throttled_requests')
+                if rate_limited:
+                    self.rate_limiter.pause(delay)
+            logger.warning(
+                f"GET {url}, Status Code: {response.status_code}; retrying in {delay:.1f}s"
+            )
+            metrics.count('retried_requests')
+            response.close()
+            if not (rate_limited and response.status_code == 429):
+                time.sleep(delay)
+
+    def get_json(self, url, kind):
+        """GET an API URL and return the decoded JSON, or None on failure.
+
+        Concurrent calls for the same URL wait for the first one instead of
+        sending their own request.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self._inflight[url] = Future()
+        if not owner:
+            metrics.count('coalesced_requests')
+            return future.result()
+
+        try:
+            result = self._get_json(url, kind)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[url]
+
+    def _get_json(self, url, kind):
+        """Serve an API URL from the cache, revalidating or refetching it when stale.
+
+        Responses are served from the cache while they are younger than the
+        TTL for their endpoint kind. Older entries are revalidated with
+        If-None-Match/If-Modified-Since so an unchanged response costs a 304.
+        """
+        cached = None if self.refresh or self.cache is None else self.cache.get(url)
+        if cached and time.time() - cached.fetched_at < self.ttls.get(kind, 0):
+            logger.info(f"Using cached SteamGridDB response for {url}")
+            metrics.count('cache_hits')
+            return json.loads(cached.body)
+
+        headers = {
+            'Authorization': f'Bearer {self.api_key}'
+        }
+        if cached:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        response = self.request(url, headers=headers)
+        logger.info(f"GET {url}, Status Code: {response.status_code}")
+        if response.status_code == 304 and cached:
+            metrics.count('cache_revalidations')
+            self.cache.touch(url)
+            return json.loads(cached.body)
+        metrics.count('cache_misses')
+        if response.status_code == 200:
+            if self.cache is not None:
+                self.cache.put(
+                    url, response.content,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+            return response.json()
+        return None
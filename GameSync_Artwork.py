@@ -0,0 +1,233 @@
+"""Index of the artwork stored in Steam grid folders, and a shared image store."""
+import os
+import re
+import shutil
+import hashlib
+import threading
+
+from GameSync_Store import atomic_write_json, load_json
+
+IMAGE_TYPES = ('grid', 'hero', 'logo')
+
+# File name suffix Steam expects for each image type, e.g. 1234p.png for a grid
+IMAGE_SUFFIXES = {'grid': 'p', 'hero': '_hero', 'logo': '_logo'}
+
+_ARTWORK_NAME = re.compile(r'^(\d+)(p|_hero|_logo)(\.[A-Za-z0-9]+)$')
+_TYPES_BY_SUFFIX = {suffix: image_type for image_type, suffix in IMAGE_SUFFIXES.items()}
+
+
+def artwork_filename(appid, image_type, extension):
+    """Return the grid folder file name of an image, e.g. '1234_hero.png'."""
+    return f"{appid}{IMAGE_SUFFIXES[image_type]}{extension}"
+
+
+def parse_artwork_filename(file_name):
+    """Return (appid, image_type) for a grid folder file name, or None."""
+    match = _ARTWORK_NAME.match(file_name)
+    if not match:
+        return None
+    return match.group(1), _TYPES_BY_SUFFIX[match.group(2)]
+
+
+def list_artwork(folder):
+    """List a grid folder once; return appid -> [(file name, size, link count)].
+
+    Only grid, hero and logo images are listed. A missing folder lists as empty.
+    """
+    artwork = {}
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                parsed = parse_artwork_filename(entry.name)
+                if not parsed:
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if entry.is_file(follow_symlinks=False):
+                    artwork.setdefault(parsed[0], []).append(
+                        (entry.name, stat.st_size, stat.st_nlink)
+                    )
+    except FileNotFoundError:
+        pass
+    return artwork
+
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def place_file(source_path, target_path):
+    """Hardlink source_path to target_path, or copy it where a link is not possible.
+
+    The file appears at target_path atomically. Returns 'link' or 'copy'.
+    """
+    tmp_path = f"{target_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(source_path, tmp_path)
+        how = 'link'
+    except OSError:
+        shutil.copyfile(source_path, tmp_path)
+        how = 'copy'
+    os.replace(tmp_path, target_path)
+    return how
+
+
+class ArtworkManifest:
+    """Which grid, hero and logo images exist for each appid.
+
+    Built from a single listing of the grid folder the first time it is
+    queried and kept up to date as images are saved.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._images = None  # appid -> {image_type: file name}
+
+    def _load(self):
+        """List the grid folder once and index its artwork by appid."""
+        images = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    parsed = parse_artwork_filename(entry.name)
+                    if parsed and entry.is_file():
+                        appid, image_type = parsed
+                        images.setdefault(appid, {})[image_type] = entry.name
+        except FileNotFoundError:
+            pass
+        self._images = images
+
+    def images(self, appid):
+        """Return a dict of image type to file name for an appid."""
+        with self._lock:
+            if self._images is None:
+                self._load()
+            return dict(self._images.get(str(appid), {}))
+
+    def missing(self, appid, image_types=IMAGE_TYPES):
+        """Return the image types that have no file yet for an appid."""
+        present = self.images(appid)
+        return [image_type for image_type in image_types if image_type not in present]
+
+    def add(self, appid, image_type, file_name):
+        """Record that an image was saved for an appid."""
+        with self._lock:
+            if self._images is None:
+                self._load()
+            self._images.setdefault(str(appid), {})[image_type] = file_name
+
+    def forget(self, appid):
+        """Record that every image of an appid was removed."""
+        with self._lock:
+            if self._images is not None:
+                self._images.pop(str(appid), None)
+
+
+class ImageStore:
+    """Content-addressed folder of downloaded images shared by several grid folders.
+
+    Each image is stored once under the SHA-256 of its content and placed
+    into grid folders as a hardlink, or as a copy where a hardlink is not
+    possible (another drive, a file system without links). An index maps
+    image URLs to stored files so an image is downloaded only once.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._dirty = False
+        os.makedirs(folder, exist_ok=True)
+        self._index_path = os.path.join(folder, self.INDEX_FILE)
+        self._urls = load_json(self._index_path, default={}) or {}
+
+    def lookup(self, url):
+        """Return the stored file of an image URL, or None if it is not stored."""
+        with self._lock:
+            file_name = self._urls.get(url)
+        if file_name:
+            path = os.path.join(self.folder, file_name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def download_path(self, url, extension):
+        """Return the temporary path an image URL is downloaded to before add()."""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, f"download-{digest}{extension}")
+
+    def add(self, url, path):
+        """Move a downloaded file into the store and return its stored path."""
+        file_name = file_sha256(path) + os.path.splitext(path)[1]
+        stored_path = os.path.join(self.folder, file_name)
+        if os.path.exists(stored_path):
+            os.remove(path)  # Same image under another URL
+        else:
+            os.replace(path, stored_path)
+        with self._lock:
+            self._urls[url] = file_name
+            self._dirty = True
+        return stored_path
+
+    def place(self, stored_path, target_path):
+        """Put a stored image at target_path; return 'link' or 'copy'."""
+        return place_file(stored_path, target_path)
+
+    def prune(self, dry_run=False):
+        """Remove stored images that no grid folder links to any more.
+
+        A stored image with a single link is only held by the store. Images
+        that were copied into grid folders instead of linked look the same,
+        so they are removed too and downloaded again if an account needs
+        them later. Returns (file names, bytes reclaimed).
+        """
+        removed, reclaimed = [], 0
+        with self._lock:
+            stored_names = set(self._urls.values())
+            try:
+                entries = list(os.scandir(self.folder))
+            except FileNotFoundError:
+                return removed, reclaimed
+            for entry in entries:
+                if entry.name not in stored_names:
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.st_nlink > 1:
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        continue
+                removed.append(entry.name)
+                reclaimed += stat.st_size
+            if removed and not dry_run:
+                removed_names = set(removed)
+                self._urls = {
+                    url: name for url, name in self._urls.items() if name not in removed_names
+                }
+                self._dirty = True
+        return removed, reclaimed
+
+    def flush(self):
+        """Write the URL index if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            atomic_write_json(self._index_path, self._urls)
+            self._dirty = False
+            return True
@@ -0,0 +1,398 @@
+"""Benchmark harness for the sync engine.
+
+Builds a synthetic game library, Desktop and Steam user folder in a
+temporary directory, serves a local stand-in for the SteamGridDB API and
+drives read_current_games, find_largest_exe and update_shortcuts end to
+end. Results are written as JSON so they can be compared between versions.
+
+Example:
+    python GameSync_Benchmark.py --games 600 --latency-ms 80 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import struct
+import argparse
+import platform
+import tempfile
+import threading
+import importlib
+import logging
+from collections import Counter
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCHMARK_FORMAT_VERSION = 1
+
+# Tiny valid PNG served for every image
+PNG_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+
+def make_lnk(target):
+    """Return the bytes of a minimal .lnk file pointing at target."""
+    header = struct.pack('<I16sI', 0x4C, bytes.fromhex('0114020000000000c000000000000046'), 0x2)
+    header += b'\x00' * (0x4C - len(header))
+    volume_id = struct.pack('<IIII', 16, 3, 0, 0x10)
+    base_path = target.encode('cp1252', errors='replace') + b'\x00'
+    header_size = 0x1C
+    local_base_path_offset = header_size + len(volume_id)
+    common_path_suffix_offset = local_base_path_offset + len(base_path)
+    body = volume_id + base_path + b'\x00'
+    link_info = struct.pack(
+        '<7I', header_size + len(body), header_size, 0x1, header_size,
+        local_base_path_offset, 0, common_path_suffix_offset
+    ) + body
+    return header + link_info + b'\x00\x00\x00\x00'
+
+
+def build_library(root, games, depth, files, exes, shortcuts, seed):
+    """Create a synthetic library and return its layout as a dict.
+
+    Each game folder gets a chain of `depth` nested folders with `files`
+    filler files in each, `exes` sparse executables spread over those
+    folders, and a _CommonRedist folder the scanner should skip.
+    """
+    rng = random.Random(seed)
+    library = os.path.join(root, 'library')
+    desktop = os.path.join(root, 'desktop')
+    user_config = os.path.join(root, 'steam', 'userdata', '1', 'config')
+    for path in (library, desktop, user_config):
+        os.makedirs(path, exist_ok=True)
+
+    game_names = []
+    main_exes = {}
+    for index in range(games):
+        name = f"Synthetic Game {index:04d}"
+        game_dir = os.path.join(library, name)
+        folders = [game_dir]
+        for level in range(depth):
+            folders.append(os.path.join(folders[-1], f"level{level}"))
+        os.makedirs(folders[-1], exist_ok=True)
+        redist = os.path.join(game_dir, '_CommonRedist')
+        os.makedirs(redist, exist_ok=True)
+
+        for folder in folders:
+            for file_index in range(files):
+                with open(os.path.join(folder, f"data{file_index}.pak"), 'wb') as f:
+                    f.write(b'\x00' * 16)
+
+        for exe_index in range(exes):
+            folder = folders[rng.randrange(len(folders))]
+            exe_name = f"{name.replace(' ', '')}.exe" if exe_index == 0 else f"tool{exe_index}.exe"
+            exe_path = os.path.join(folder, exe_name)
+            with open(exe_path, 'wb') as f:
+                f.truncate(rng.randint(1, 200) * 1024 * 1024)  # Sparse, costs no disk
+            if exe_index == 0:
+                main_exes[name] = exe_path
+        with open(os.path.join(redist, 'vcredist_x64.exe'), 'wb') as f:
+            f.truncate(30 * 1024 * 1024)
+        game_names.append(name)
+
+    for name in rng.sample(game_names, min(shortcuts, len(game_names))):
+        if name in main_exes:
+            with open(os.path.join(desktop, f"{name}.lnk"), 'wb') as f:
+                f.write(make_lnk(main_exes[name]))
+
+    return {'library': library, 'desktop': desktop, 'user_config': user_config,
+            'steamdir': os.path.join(root, 'steam'), 'games': game_names}
+
+
+class FakeSteamGridDB:
+    """Local HTTP server that answers like the SteamGridDB v2 API.
+
+    Every request waits `latency` seconds. A fraction of requests fail with
+    500 (error_rate) or 429 with Retry-After (throttle_rate).
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        """Root URL of the server, e.g. http://127.0.0.1:54321."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving on a background thread."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and release its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self):
+        """Forget the request counts of the previous run."""
+        with self._lock:
+            self.requests.clear()
+
+    def _roll(self):
+        """Return the status code to fail this request with, or None."""
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        return None
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type='application/json', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                parts = [unquote(part) for part in self.path.split('?')[0].strip('/').split('/')]
+                endpoint = self._endpoint(parts)
+                with fake._lock:
+                    fake.requests[endpoint] += 1
+                    fake.requests['total'] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                failure = fake._roll()
+                if failure == 429:
+                    return self._send(429, b'{"success":false}', headers={'Retry-After': '1'})
+                if failure:
+                    return self._send(failure, b'{"success":false}')
+
+                if endpoint == 'image':
+                    return self._send(200, PNG_BYTES, 'image/png', {'ETag': '"img"'})
+                if endpoint == 'search':
+                    game_id = zlib.crc32(parts[-1].encode('utf-8')) % 10 ** 6
+                    payload = {'success': True, 'data': [{'id': game_id, 'name': parts[-1]}]}
+                elif endpoint in ('grids', 'heroes', 'logos'):
+                    game_id = parts[-1]
+                    payload = {'success': True, 'data': [
+                        {'url': f"{fake.base_url}/images/{endpoint}_{game_id}.png"}
+                    ]}
+                else:
+                    return self._send(404, b'{"success":false}')
+
+                body = json.dumps(payload).encode('utf-8')
+                etag = f'"{zlib.crc32(body)}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return None
+                return self._send(200, body, headers={'ETag': etag})
+
+            @staticmethod
+            def _endpoint(parts):
+                if parts and parts[0] == 'images':
+                    return 'image'
+                if 'autocomplete' in parts:
+                    return 'search'
+                for kind in ('grids', 'heroes', 'logos'):
+                    if kind in parts:
+                        return kind
+                return 'other'
+
+        return Handler
+
+
+class SyscallCounter:
+    """Counts calls to the os functions that dominate filesystem scanning."""
+
+    FUNCTIONS = ('scandir', 'listdir', 'stat', 'lstat', 'walk')
+
+    def __init__(self):
+        self.counts = Counter()
+        self._originals = {}
+
+    def __enter__(self):
+        for name in self.FUNCTIONS:
+            original = getattr(os, name)
+            self._originals[name] = original
+
+            def wrapper(*args, _name=name, _original=original, **kwargs):
+                self.counts[_name] += 1
+                return _original(*args, **kwargs)
+
+            setattr(os, name, wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+
+def write_config(path, layout, api_url, concurrency, rate):
+    """Write the config.ini the engine reads for a benchmark run."""
+    with open(path, 'w') as f:
+        f.write(
+            "[Paths]\n"
+            f"steam_user_data_path = {layout['user_config']}\n"
+            f"game_installation_paths = {layout['library']}\n"
+            f"steamdir_path = {layout['steamdir']}\n"
+            f"desktop_path = {layout['desktop']}\n\n"
+            "[SteamGridDB]\n"
+            "api_key = benchmark\n"
+            f"api_url = {api_url}/api/v2\n"
+            f"requests_per_second = {rate}\n\n"
+            "[Performance]\n"
+            f"max_concurrent_requests = {concurrency}\n"
+        )
+
+
+def timed(phases, name, func, *args):
+    """Run func, store its wall time under phases[name] and return its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    phases[name] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def load_engine():
+    """Import a fresh copy of the engine module and create an engine from config.ini."""
+    sys.modules.pop('GameSync_Engine', None)
+    module = importlib.import_module('GameSync_Engine')
+    return module.SyncEngine(module.load_config('config.ini'))
+
+
+def run_sync(workdir, server, label):
+    """Create a fresh engine in workdir and run one timed sync."""
+    from GameSync_Metrics import metrics
+
+    server.reset_counts()
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    phases = {}
+    try:
+        with SyscallCounter() as syscalls:
+            engine = timed(phases, 'import', load_engine)
+            logging.getLogger('GameSync_Engine').setLevel('WARNING')
+            logging.getLogger('GameSync_API').setLevel('ERROR')
+            metrics.reset()
+
+            current_games = timed(phases, 'read_current_games', engine.read_current_games)
+
+            def rank_all():
+                for game_name in current_games:
+                    game_dir = engine.game_folder_paths[game_name]
+                    engine.find_largest_exe(game_dir, game_name, False)
+
+            timed(phases, 'find_largest_exe', rank_all)
+            timed(phases, 'update_shortcuts', engine.update_shortcuts, current_games)
+
+            timed(phases, 'flush', engine.save_state)
+        phases['total'] = round(sum(phases.values()), 6)
+        return {
+            'name': label,
+            'games': len(current_games),
+            'phases': phases,
+            'syscalls': dict(syscalls.counts),
+            'requests': dict(server.requests),
+            'snapshot': dict(engine.library_snapshot.stats),
+            'metrics': metrics.as_dict(),
+        }
+    finally:
+        os.chdir(previous_cwd)
+
+
+def parse_args(argv=None):
+    """Parse the benchmark's command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the game sync engine on a synthetic library.")
+    parser.add_argument('--games', type=int, default=100, help="Number of game folders")
+    parser.add_argument('--depth', type=int, default=3, help="Nested folder levels per game")
+    parser.add_argument('--files', type=int, default=20, help="Filler files per folder")
+    parser.add_argument('--exes', type=int, default=4, help="Executables per game")
+    parser.add_argument('--shortcuts', type=int, default=10, help="Desktop shortcuts to create")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Fake API latency per request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--concurrency', type=int, default=8, help="max_concurrent_requests for the run")
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help="requests_per_second for the run (0, the default, disables the limit)")
+    parser.add_argument('--runs', type=int, default=2,
+                        help="Syncs to run on the same library (the first is cold, the rest warm)")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--workdir', help="Build the library here instead of a temporary directory")
+    parser.add_argument('--keep', action='store_true', help="Keep the synthetic library afterwards")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Build the synthetic setup, run the syncs and emit the JSON report."""
+    args = parse_args(argv)
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    os.environ['NO_PROXY'] = '127.0.0.1,localhost'
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='gamesync-bench-')
+    server = FakeSteamGridDB(args.latency_ms / 1000.0, args.error_rate,
+                             args.throttle_rate, args.seed).start()
+    try:
+        build_start = time.perf_counter()
+        layout = build_library(workdir, args.games, args.depth, args.files,
+                               args.exes, args.shortcuts, args.seed)
+        build_time = time.perf_counter() - build_start
+        write_config(os.path.join(workdir, 'config.ini'), layout,
+                     server.base_url, args.concurrency, args.rate)
+
+        runs = []
+        for index in range(args.runs):
+            label = 'cold' if index == 0 else f'warm{index}'
+            runs.append(run_sync(workdir, server, label))
+
+        report = {
+            'format_version': BENCHMARK_FORMAT_VERSION,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'workdir', 'keep')},
+            'library_build_seconds': round(build_time, 3),
+            'runs': runs,
+        }
+    finally:
+        server.stop()
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""SQLite cache of SteamGridDB API responses, bounded in size and revalidated by ETag."""
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+CACHE_SCHEMA_VERSION = 1
+
+CachedResponse = namedtuple(
+    'CachedResponse', ['url', 'body', 'etag', 'last_modified', 'fetched_at']
+)
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of HTTP response bodies stored in SQLite.
+
+    Entries remember their ETag and Last-Modified headers so stale entries
+    can be revalidated with a conditional request instead of refetched.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != CACHE_SCHEMA_VERSION:
+            self._conn.execute('DROP TABLE IF EXISTS responses')
+            self._conn.execute(f'PRAGMA user_version={CACHE_SCHEMA_VERSION}')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' url TEXT PRIMARY KEY,'
+            ' body BLOB NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' size INTEGER NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS responses_accessed_at '
+            'ON responses (accessed_at)'
+        )
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()[0]
+
+    def get(self, url):
+        """Return the cached response for a URL, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, body, etag, last_modified, fetched_at '
+                'FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                'UPDATE responses SET accessed_at = ? WHERE url = ?',
+                (time.time(), url)
+            )
+        return CachedResponse(*row)
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """Store a response body, evicting least recently used entries if needed."""
+        now = time.time()
+        size = len(body)
+        with self._lock:
+            old = self._conn.execute(
+                'SELECT size FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, body, etag, last_modified, fetched_at, accessed_at, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, now, now, size)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def touch(self, url):
+        """Mark a cached response as freshly validated (after a 304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?',
+                (now, now, url)
+            )
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is 90% of its limit."""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute(
+            'SELECT url, size FROM responses ORDER BY accessed_at'
+        )
+        victims = []
+        for url, size in rows:
+            if self._total_bytes <= target:
+                break
+            victims.append((url,))
+            self._total_bytes -= size
+        self._conn.executemany('DELETE FROM responses WHERE url = ?', victims)
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,165 @@
+"""Local catalog of game titles and their SteamGridDB ids, with optional artwork files.
+
+The catalog is consulted before the SteamGridDB API, and in --offline mode
+it is the only source of game ids besides cached responses. Titles are
+stored under their normalized key (GameSync_Names.name_key), so
+"Hollow_Knight" and "Hollow Knight GOTY Edition" find the same entry with
+one indexed lookup; a trigram NameIndex over all titles is built on the
+first miss for fuzzy matches. A fuzzy match never crosses numbers, so a
+catalog holding "Dark Souls III" does not answer for "Dark Souls II":
+offline, there is no search to correct a wrong id.
+
+Catalogs are imported in bulk from CSV or JSON. A CSV file has a header
+row with the columns title (or name), game_id (or id) and optionally grid,
+hero and logo, holding image file paths. A JSON file is a list of such
+objects, an object mapping titles to ids or to such objects, or a saved
+SteamGridDB search response ({"data": [{"id": ..., "name": ...}]}).
+Relative image paths are resolved against the folder of the imported file.
+"""
+import os
+import csv
+import json
+import sqlite3
+import threading
+
+from GameSync_Artwork import IMAGE_TYPES
+from GameSync_Names import NameIndex, name_key
+
+CATALOG_SCHEMA_VERSION = 1
+
+# Accepted column names, first match wins
+TITLE_FIELDS = ('title', 'name')
+GAME_ID_FIELDS = ('game_id', 'id', 'steamgriddb_id')
+
+
+def catalog_entry(record, base_folder=''):
+    """Turn an imported record into a catalog row dict, or None if it lacks a title or id."""
+    title = next((str(record[field]).strip() for field in TITLE_FIELDS
+                  if record.get(field) not in (None, '')), '')
+    game_id = next((record[field] for field in GAME_ID_FIELDS
+                    if record.get(field) not in (None, '')), None)
+    try:
+        game_id = int(game_id)
+    except (TypeError, ValueError):
+        return None
+    if not title:
+        return None
+    entry = {'key': name_key(title), 'title': title, 'game_id': game_id}
+    for image_type in IMAGE_TYPES:
+        path = (record.get(image_type) or '').strip()
+        entry[image_type] = os.path.join(base_folder, path) if path else None
+    return entry
+
+
+def read_catalog_records(path):
+    """Read the records of a CSV or JSON catalog file as a list of dicts."""
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            return [
+                {(key or '').strip().lower(): value for key, value in row.items()}
+                for row in csv.DictReader(f)
+            ]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get('data'), list):
+        data = data['data']
+    if isinstance(data, dict):
+        return [
+            dict(value, title=title) if isinstance(value, dict)
+            else {'title': title, 'game_id': value}
+            for title, value in data.items()
+        ]
+    if isinstance(data, list):
+        return [record for record in data if isinstance(record, dict)]
+    raise ValueError(f"{path} is not a catalog: expected a list or an object")
+
+
+class TitleCatalog:
+    """SQLite table of normalized titles to SteamGridDB game ids and local image files."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._fuzzy = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != CATALOG_SCHEMA_VERSION:
+            self._conn.execute('DROP TABLE IF EXISTS titles')
+            self._conn.execute(f'PRAGMA user_version={CATALOG_SCHEMA_VERSION}')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS titles ('
+            'key TEXT PRIMARY KEY, title TEXT NOT NULL, game_id INTEGER NOT NULL, '
+            'grid TEXT, hero TEXT, logo TEXT)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS titles_game_id ON titles (game_id)'
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM titles').fetchone()[0]
+
+    def lookup(self, title):
+        """Return the SteamGridDB id of the closest catalog title, or None.
+
+        Titles whose numbers differ from the query never match (see
+        GameSync_Names.similarity()).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT game_id FROM titles WHERE key = ?', (name_key(title),)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            if self._fuzzy is None:
+                self._fuzzy = NameIndex(
+                    self._conn.execute('SELECT title, game_id FROM titles').fetchall()
+                )
+        return self._fuzzy.lookup(title)
+
+    def images(self, game_id):
+        """Return the local image files of a game id as image type -> path (existing files only)."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT grid, hero, logo FROM titles WHERE game_id = ? '
+                'AND COALESCE(grid, hero, logo) IS NOT NULL', (game_id,)
+            ).fetchone()
+        if row is None:
+            return {}
+        return {
+            image_type: path for image_type, path in zip(IMAGE_TYPES, row)
+            if path and os.path.isfile(path)
+        }
+
+    def add_entries(self, entries):
+        """Insert or replace catalog rows in one transaction; return the number written."""
+        rows = [
+            (entry['key'], entry['title'], entry['game_id'],
+             entry['grid'], entry['hero'], entry['logo'])
+            for entry in entries
+        ]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO titles (key, title, game_id, grid, hero, logo) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', rows
+                )
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            self._fuzzy = None
+        return len(rows)
+
+    def import_file(self, path):
+        """Bulk import a CSV or JSON catalog file; return (rows imported, records skipped)."""
+        base_folder = os.path.dirname(os.path.abspath(path))
+        records = read_catalog_records(path)
+        entries = [catalog_entry(record, base_folder) for record in records]
+        valid = [entry for entry in entries if entry is not None]
+        return self.add_entries(valid), len(entries) - len(valid)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,2000 @@
+"""The sync engine: finds installed games and adds them to Steam with artwork.
+
+SyncEngine takes its settings from an explicit config object and touches
+nothing on import: state files are loaded, folders created and the HTTP,
+VDF, SQLite and watchdog libraries imported only when a method needs
+them. Methods return JSON-ready results; GameSync_Main.py is the command
+line on top of it.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import zlib
+import logging
+import threading
+import configparser
+from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from GameSync_Artwork import (
+    IMAGE_TYPES, ArtworkManifest, ImageStore, artwork_filename, list_artwork,
+    parse_artwork_filename, place_file
+)
+from GameSync_Fingerprint import InstallIndex, fingerprint_file, fingerprint_size
+from GameSync_Lnk import DesktopShortcutIndex, resolve_lnk
+from GameSync_Metrics import metrics
+from GameSync_Names import NameIndex, best_match, plain_key
+from GameSync_Rank import DEFAULT_HELPER_KEYWORDS, DEFAULT_WEIGHTS, ExeRanker
+from GameSync_Scan import DEFAULT_IGNORE_GLOBS, compile_ignore_globs, scan_exes
+from GameSync_Store import (
+    ExeChoiceStore, ExeInfoCache, LibrarySnapshot, RunJournal, atomic_write_json, load_json
+)
+
+logger = logging.getLogger(__name__)
+
+# State files kept between runs, relative to the engine's state_dir
+cache_file = "cache.txt"  # Legacy exe choice file, imported once into exe_choices.json
+exe_choices_file = "exe_choices.json"  # Exe choice store
+library_snapshot_file = "library_snapshot.json"  # Directory snapshot from the previous run
+exe_info_cache_file = "exe_info_cache.json"  # PE header facts of every ranked exe
+response_cache_file = "steamgriddb_cache.sqlite"  # SteamGridDB response cache
+run_journal_file = "run_journal.jsonl"  # Progress of the current run, kept if it is interrupted
+install_index_file = "install_index.json"  # Fingerprints of the exes of created shortcuts
+catalog_file = "steamgriddb_catalog.sqlite"  # Local title -> SteamGridDB id catalog
+
+PLAN_VERSION = 2
+
+# Set in the appid of every non-Steam shortcut; grid images of Steam's own
+# games have appids without it and are never pruned
+NON_STEAM_APPID_BIT = 0x80000000
+
+# Largest artwork size per image type kept by post-processing, as WIDTHxHEIGHT
+DEFAULT_MAX_IMAGE_SIZES = {'grid': '600x900', 'hero': '1920x620', 'logo': '1280x720'}
+
+SteamAccount = namedtuple('SteamAccount', ['account_id', 'shortcuts_file', 'grid_folder'])
+
+
+class SyncCancelled(Exception):
+    """Raised inside a run that was stopped through its cancel event."""
+
+
+class DownloadError(Exception):
+    """Raised when a downloaded image is too large or fails verification."""
+
+
+def load_config(path='config.ini'):
+    """Read a config.ini into a ConfigParser."""
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+
+def generate_appid(game_name, exe_path):
+    """Generate a unique appid for the game based on its exe path and name."""
+    unique_name = (exe_path + game_name).encode('utf-8')
+    legacy_id = zlib.crc32(unique_name) | NON_STEAM_APPID_BIT
+    return str(legacy_id)
+
+
+def capitalize_game_name(game_name):
+    """Convert a game name to title case (capitalize each word)."""
+    return game_name.title()
+
+
+def resolve_shortcut_path(lnk_path):
+    """Resolve a .lnk shortcut file to its target executable."""
+    return resolve_lnk(lnk_path)
+
+
+def write_plan(plan, path):
+    """Write a plan to a JSON file."""
+    atomic_write_json(path, plan)
+
+
+def load_plan(path):
+    """Read a plan written by --plan; raise ValueError if it is not one."""
+    plan = load_json(path)
+    if not isinstance(plan, dict) or plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"{path} is not a GameSync plan (version {PLAN_VERSION})")
+    return plan
+
+
+def find_ignoring_case(folder, parts):
+    """Return the path of folder joined with the lowercase parts, matching names without case.
+
+    Returns None if it does not exist. Shortcut exes are stored lowercase,
+    which os.path.exists() only finds on case-insensitive file systems.
+    """
+    for part in parts:
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return None
+        match = next((name for name in names if name.lower() == part), None)
+        if match is None:
+            return None
+        folder = os.path.join(folder, match)
+    return folder
+
+
+def _log_shortcut_error(file, error):
+    """Log a desktop shortcut that could not be resolved."""
+    logger.error(f"Error resolving shortcut {file}: {error}")
+
+
+class SyncEngine:
+    """Adds installed games to Steam as non-Steam shortcuts and fetches their artwork.
+
+    config is a ConfigParser, or a dict of sections, with the settings of
+    config.ini. The keyword flags match the command line switches.
+    progress is called as (stage, done, total) while a run goes on;
+    choose_exes replaces the console session of selective mode: it gets
+    the ambiguous games (see plan_sync()) and returns a dict of game name
+    to chosen exe, where None or a missing game skips it.
+    """
+
+    def __init__(self, config, selective=False, refresh_artwork=False,
+                 backfill_artwork=False, all_accounts=False, full_rescan=False,
+                 state_dir='', progress=None, choose_exes=None, offline=False):
+        if not isinstance(config, configparser.ConfigParser):
+            parser = configparser.ConfigParser()
+            parser.read_dict(config)
+            config = parser
+        self.config = config
+        self.selective_mode = selective
+        self.refresh_artwork = refresh_artwork
+        self.backfill_artwork = backfill_artwork
+        self.all_accounts_mode = all_accounts
+        self.full_rescan = full_rescan
+        self.state_dir = state_dir
+        self.progress = progress
+        self.choose_exes = choose_exes
+        self.offline = offline
+
+        # Paths
+        self.steam_user_data_path = config.get('Paths', 'steam_user_data_path')
+        self.game_installation_paths = [
+            path.strip() for path in config.get('Paths', 'game_installation_paths').split(',')
+        ]
+        self.steamdir_path = config.get('Paths', 'steamdir_path')
+        self.desktop_path = config.get('Paths', 'desktop_path')
+        # Folder to store grid images
+        self.grid_folder = os.path.join(self.steam_user_data_path, 'grid')
+        self.shortcuts_file = os.path.join(self.steam_user_data_path, 'shortcuts.vdf')
+        # Number of rotating shortcuts.vdf.bakN copies kept when the file is rewritten
+        self.shortcut_backups = config.getint('Paths', 'shortcut_backups', fallback=3)
+        # Shared store the images are downloaded to once and hardlinked from in
+        # all-accounts mode
+        self.image_store_folder = config.get(
+            'Paths', 'image_store',
+            fallback=os.path.join(self.steamdir_path, 'gamesync_images')
+        )
+        # Local catalog of game titles to SteamGridDB ids, searched before the API
+        self.catalog_path = config.get('Paths', 'catalog', fallback='') or self.state_path(
+            catalog_file
+        )
+
+        # SteamGridDB API Key
+        self.steamgriddb_api_key = config.get('SteamGridDB', 'api_key')
+        self.steamgriddb_api_url = config.get(
+            'SteamGridDB', 'api_url', fallback='https://www.steamgriddb.com/api/v2'
+        ).rstrip('/')
+
+        # SteamGridDB request pacing: sustained requests per second and burst size,
+        # per-request timeout in seconds and how often a failed request is retried
+        self.api_requests_per_second = config.getfloat(
+            'SteamGridDB', 'requests_per_second', fallback=4
+        )
+        self.api_burst = config.getint('SteamGridDB', 'burst', fallback=8)
+        self.api_timeout = config.getfloat('SteamGridDB', 'timeout_seconds', fallback=30)
+        self.api_max_retries = max(0, config.getint('SteamGridDB', 'max_retries', fallback=4))
+
+        # Number of games whose artwork is fetched at the same time
+        self.max_concurrent_requests = max(
+            1, config.getint('Performance', 'max_concurrent_requests', fallback=8)
+        )
+
+        # Seconds between mid-run checkpoints, which save changed shortcuts files
+        # and state stores so an interrupted run loses at most this much work
+        self.checkpoint_seconds = config.getfloat(
+            'Performance', 'checkpoint_seconds', fallback=30
+        )
+
+        # Largest image that will be downloaded, and the chunk size used while streaming it
+        self.max_image_bytes = int(
+            config.getfloat('Images', 'max_image_mb', fallback=50) * 1024 * 1024
+        )
+        self.download_chunk_size = 64 * 1024
+
+        # Optional artwork post-processing (needs Pillow): largest size per image
+        # type, output format, quality and whether animated images keep only their
+        # first frame. Results are cached in processed_cache, by default inside the
+        # image store so they can be hardlinked into the grid folders.
+        self.postprocess_artwork = config.getboolean('Images', 'postprocess', fallback=False)
+        self.postprocess_settings = {}
+        for image_type, default_size in DEFAULT_MAX_IMAGE_SIZES.items():
+            self.postprocess_settings[image_type] = (
+                config.get('Images', f'{image_type}_max_size', fallback=default_size),
+                config.get('Images', 'format', fallback='keep').strip().lower(),
+                config.getint('Images', 'quality', fallback=90),
+                config.getboolean('Images', 'drop_animation', fallback=True),
+            )
+        self.processed_image_folder = config.get(
+            'Images', 'processed_cache',
+            fallback=os.path.join(self.image_store_folder, 'processed')
+        )
+        # Worker processes used for post-processing; 0 uses one per CPU
+        self.postprocess_workers = config.getint('Performance', 'postprocess_workers', fallback=0)
+
+        # Number of game folders and installation paths scanned at the same time
+        self.scan_workers = max(1, config.getint('Performance', 'scan_workers', fallback=8))
+
+        # Game folder scanning: how many exes to keep. A [Scan <installation path>]
+        # section overrides ignore_globs/max_depth for that path.
+        self.max_exe_candidates = max(1, config.getint('Scan', 'max_candidates', fallback=10))
+
+        # Exe ranking weights and the words that mark helper exes (crash reporters,
+        # installers...)
+        self.ranking_weights = {
+            name: config.getfloat('Ranking', name, fallback=default)
+            for name, default in DEFAULT_WEIGHTS.items()
+        }
+        self.ranking_helper_keywords = config.get(
+            'Ranking', 'helper_keywords', fallback=','.join(DEFAULT_HELPER_KEYWORDS)
+        ).split(',')
+
+        # SteamGridDB response cache, with TTLs per endpoint kind
+        self.response_cache_ttls = {
+            'search': config.getfloat('Cache', 'search_ttl_hours', fallback=168) * 3600,
+            'metadata': config.getfloat('Cache', 'metadata_ttl_hours', fallback=24) * 3600,
+        }
+        self.response_cache_max_bytes = int(
+            config.getfloat('Cache', 'max_size_mb', fallback=64) * 1024 * 1024
+        )
+
+        # Watch mode: seconds without new changes before a batch is synced, how often
+        # folders are listed when polling, and whether to poll even if watchdog is installed
+        self.watch_debounce_seconds = config.getfloat('Watch', 'debounce_seconds', fallback=5)
+        self.watch_poll_seconds = config.getfloat('Watch', 'poll_seconds', fallback=10)
+        self.watch_polling = config.getboolean('Watch', 'polling', fallback=False)
+
+        # Game folder paths found by read_current_games, keyed by lowercase folder name
+        self.game_folder_paths = {}
+        self.library_read = False
+        # Installation directories that could not be listed this run
+        self.unreadable_paths = set()
+
+        self._lazy_lock = threading.RLock()
+        self._lazy_values = {}
+        self._artwork_manifests = {}
+        self._scan_settings = {}
+        self._scan_settings_lock = threading.Lock()
+        self._last_checkpoint = time.monotonic()
+        # Downloads into the image store in progress, by URL
+        self._store_downloads = {}
+        self._store_downloads_lock = threading.Lock()
+
+    def state_path(self, file_name):
+        """Return the path of a state file in state_dir."""
+        return os.path.join(self.state_dir, file_name)
+
+    def _lazy(self, name, factory):
+        """Return the object stored under name, creating it with factory on first use."""
+        with self._lazy_lock:
+            if name not in self._lazy_values:
+                self._lazy_values[name] = factory()
+            return self._lazy_values[name]
+
+    def _loaded(self, name):
+        """Return the object stored under name if it was created, else None."""
+        with self._lazy_lock:
+            return self._lazy_values.get(name)
+
+    @property
+    def exe_choice_store(self):
+        """Exe choices from previous runs, loaded once and flushed by save_state()."""
+        return self._lazy('exe_choice_store', lambda: ExeChoiceStore(
+            self.state_path(exe_choices_file), legacy_path=self.state_path(cache_file)
+        ))
+
+    @property
+    def library_snapshot(self):
+        """Library snapshot from the previous run, flushed by save_state()."""
+        return self._lazy('library_snapshot', lambda: LibrarySnapshot(
+            self.state_path(library_snapshot_file), full_rescan=self.full_rescan
+        ))
+
+    @property
+    def exe_info_cache(self):
+        """PE header facts of ranked exes, flushed with the other stores."""
+        return self._lazy('exe_info_cache', lambda: ExeInfoCache(
+            self.state_path(exe_info_cache_file)
+        ))
+
+    @property
+    def install_index(self):
+        """Fingerprints of the exes of created shortcuts, flushed with the other stores."""
+        return self._lazy('install_index', lambda: InstallIndex(
+            self.state_path(install_index_file)
+        ))
+
+    @property
+    def exe_ranker(self):
+        """Ranks candidate exes using the PE header cache."""
+        return self._lazy('exe_ranker', lambda: ExeRanker(
+            self.ranking_weights, self.ranking_helper_keywords, self.exe_info_cache
+        ))
+
+    @property
+    def desktop_shortcut_index(self):
+        """Desktop shortcuts, parsed once and re-read only when the Desktop changes."""
+        return self._lazy('desktop_shortcut_index', lambda: DesktopShortcutIndex(
+            self.desktop_path, on_error=_log_shortcut_error
+        ))
+
+    @property
+    def artwork_manifest(self):
+        """Images already in the configured grid folder, listed once per engine."""
+        return self.get_artwork_manifest(self.grid_folder)
+
+    def get_artwork_manifest(self, folder):
+        """Return the manifest of a grid folder; each folder is listed once."""
+        with self._lazy_lock:
+            if folder not in self._artwork_manifests:
+                self._artwork_manifests[folder] = ArtworkManifest(folder)
+            return self._artwork_manifests[folder]
+
+    def get_image_store(self):
+        """Return the shared content-addressed image store."""
+        return self._lazy('image_store', lambda: ImageStore(self.image_store_folder))
+
+    def get_response_cache(self):
+        """Return the on-disk cache of SteamGridDB API responses."""
+        def create():
+            from GameSync_Cache import ResponseCache
+            return ResponseCache(
+                self.state_path(response_cache_file), self.response_cache_max_bytes
+            )
+        return self._lazy('response_cache', create)
+
+    def get_catalog(self):
+        """Return the local title catalog, or None if there is no catalog file."""
+        def create():
+            if not os.path.exists(self.catalog_path):
+                return None
+            from GameSync_Catalog import TitleCatalog
+            return TitleCatalog(self.catalog_path)
+        return self._lazy('catalog', create)
+
+    def import_catalog(self, path):
+        """Bulk import a CSV or JSON catalog file; return (rows imported, records skipped)."""
+        from GameSync_Catalog import TitleCatalog
+        with self._lazy_lock:
+            catalog = self._lazy_values.get('catalog')
+            if catalog is None:
+                catalog = self._lazy_values['catalog'] = TitleCatalog(self.catalog_path)
+        return catalog.import_file(path)
+
+    def get_image_processor(self):
+        """Return the artwork post-processor, or None if post-processing is off.
+
+        Post-processing also stays off, with a warning, if Pillow is missing.
+        """
+        def create():
+            if not self.postprocess_artwork:
+                return None
+            from GameSync_Postprocess import (
+                FORMATS, HAVE_PILLOW, ImageProcessor, ImageSettings, parse_max_size
+            )
+            if not HAVE_PILLOW:
+                logger.warning(
+                    "Artwork post-processing needs Pillow (pip install pillow); "
+                    "images are saved as downloaded."
+                )
+                return None
+            settings = {}
+            for image_type, (max_size, image_format, quality, drop_animation) in (
+                    self.postprocess_settings.items()):
+                if image_format != 'keep' and image_format not in FORMATS:
+                    raise ValueError(f"Unknown image format {image_format!r} in [Images] format")
+                settings[image_type] = ImageSettings(
+                    parse_max_size(max_size), image_format, quality, drop_animation
+                )
+            return ImageProcessor(
+                self.processed_image_folder, settings, self.postprocess_workers or None
+            )
+        return self._lazy('image_processor', create)
+
+    def get_steamgriddb_client(self):
+        """Return the shared client used for all SteamGridDB and image traffic."""
+        def create():
+            from GameSync_API import SteamGridDBClient
+            return SteamGridDBClient(
+                self.steamgriddb_api_key,
+                cache=self.get_response_cache(),
+                ttls=self.response_cache_ttls,
+                rate=self.api_requests_per_second,
+                burst=self.api_burst,
+                timeout=self.api_timeout,
+                max_retries=self.api_max_retries,
+                pool_size=self.max_concurrent_requests,
+                refresh=self.refresh_artwork,
+            )
+        return self._lazy('steamgriddb_client', create)
+
+    def open_shortcuts(self, path):
+        """Load a shortcuts.vdf (indexed by name, exe and appid) or start it empty."""
+        from GameSync_Shortcuts import ShortcutIndex
+        return ShortcutIndex(path, backups=self.shortcut_backups)
+
+    def report_progress(self, stage, done, total):
+        """Tell the progress callback, if any, how far a stage of the run is."""
+        if self.progress is not None:
+            self.progress(stage, done, total)
+
+    # Library
+
+    def list_installation_path(self, directory):
+        """Return the game folder names in one installation directory."""
+        try:
+            # Check if the directory exists, skip if not
+            if not os.path.exists(directory):
+                logger.warning(
+                    f"Directory {directory} does not exist. Skipping."
+                )
+                return []
+
+            # Get all game folders from this directory, reusing the snapshot if unchanged
+            with metrics.phase('scan'):
+                return self.library_snapshot.list_root(directory)
+        except Exception as e:
+            logger.error(
+                f"Error reading game installation directory {directory}: {e}"
+            )
+            self.unreadable_paths.add(directory)
+            return []
+
+    def read_current_games(self):
+        """Read the current games from all the game installation directories."""
+        current_games = set()
+        self.unreadable_paths.clear()
+
+        # List every installation directory at once; they are often on different drives
+        with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+            listings = list(executor.map(
+                self.list_installation_path, self.game_installation_paths
+            ))
+
+        for directory, game_folders in zip(self.game_installation_paths, listings):
+            for folder in game_folders:
+                # The first installation path that has a game wins
+                self.game_folder_paths.setdefault(
+                    folder.lower(), os.path.join(directory, folder)
+                )
+            current_games.update({folder.lower() for folder in game_folders})
+
+        self.library_read = True
+        return current_games
+
+    # Accounts
+
+    def default_account(self):
+        """Return the account configured by steam_user_data_path."""
+        account_id = os.path.basename(
+            os.path.dirname(os.path.normpath(self.steam_user_data_path))
+        )
+        return SteamAccount(account_id, self.shortcuts_file, self.grid_folder)
+
+    def discover_accounts(self):
+        """Return every Steam account with a config folder under steamdir_path/userdata."""
+        userdata_path = os.path.join(self.steamdir_path, 'userdata')
+        try:
+            account_ids = sorted(os.listdir(userdata_path))
+        except OSError as e:
+            logger.error(f"Error reading Steam accounts in {userdata_path}: {e}")
+            return []
+        accounts = []
+        for account_id in account_ids:
+            config_path = os.path.join(userdata_path, account_id, 'config')
+            # Account 0 is Steam's placeholder for no logged-in user
+            if account_id.isdigit() and account_id != '0' and os.path.isdir(config_path):
+                accounts.append(SteamAccount(
+                    account_id,
+                    os.path.join(config_path, 'shortcuts.vdf'),
+                    os.path.join(config_path, 'grid'),
+                ))
+        return accounts
+
+    def get_accounts(self):
+        """Return the accounts this engine syncs."""
+        if not self.all_accounts_mode:
+            return [self.default_account()]
+        accounts = self.discover_accounts()
+        logger.info(
+            f"Syncing {len(accounts)} Steam accounts: "
+            f"{', '.join(account.account_id for account in accounts)}"
+        )
+        return accounts
+
+    # SteamGridDB
+
+    def get_steamgriddb_json(self, url, kind):
+        """GET a SteamGridDB API URL through the client and its response cache.
+
+        In offline mode only the response cache is read, whatever the age of
+        the entry, and a URL that is not cached returns None.
+        """
+        if not self.offline:
+            return self.get_steamgriddb_client().get_json(url, kind)
+        if not os.path.exists(self.state_path(response_cache_file)):
+            return None
+        cached = self.get_response_cache().get(url)
+        if cached is None:
+            logger.info(f"Offline: no cached SteamGridDB response for {url}")
+            return None
+        metrics.count('cache_hits')
+        return json.loads(cached.body)
+
+    def search_steamgriddb_game(self, game_name):
+        """Find the SteamGridDB id of a game: in the local catalog, else by searching the API."""
+        catalog = self.get_catalog()
+        if catalog is not None:
+            game_id = catalog.lookup(game_name)
+            if game_id is not None:
+                logger.info(f"Found {game_name} in the local catalog: game ID {game_id}")
+                metrics.count('catalog_hits')
+                return game_id
+
+        search_url = f'{self.steamgriddb_api_url}/search/autocomplete/{game_name}'
+        logger.info(f"Searching SteamGridDB for {game_name}")
+        with metrics.phase('search'):
+            data = self.get_steamgriddb_json(search_url, 'search')
+        if data and data.get('success') and data.get('data'):
+            results = data['data']
+            # Prefer the result whose title matches the game; otherwise trust the API's order
+            best = best_match(game_name, [result.get('name', '') for result in results])
+            return results[best if best is not None else 0]['id']
+        return None
+
+    def fetch_steamgriddb_image(self, game_id, image_type):
+        """Fetch a single image (first available) of specified type from SteamGridDB."""
+        if image_type == 'hero':
+            base_url = f'{self.steamgriddb_api_url}/heroes/game/{game_id}'
+        else:
+            base_url = f'{self.steamgriddb_api_url}/{image_type}s/game/{game_id}'
+
+        logger.info(f"Fetching {image_type} for game ID: {game_id}, URL: {base_url}")
+        with metrics.phase('metadata'):
+            data = self.get_steamgriddb_json(base_url, 'metadata')
+        if data and data.get('success') and data.get('data'):
+            return data['data'][0]['url']  # Return the URL of the first image found
+
+        if self.offline:
+            # Uncached lookups are expected offline; get_steamgriddb_json has said so
+            logger.info(f"No {image_type} available offline for game ID: {game_id}")
+        else:
+            logger.error(f"Failed to fetch {image_type} for game ID: {game_id}")
+        return None
+
+    def _stream_to_part_file(self, url, part_path):
+        """Stream url into part_path, resuming a previous partial download.
+
+        Returns the number of bytes downloaded by this call. Raises DownloadError
+        if the image is too large or does not match its Content-Length or
+        Content-MD5, and leaves the part file in place on network errors so the
+        next attempt can resume it.
+        """
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={resume_from}-'} if resume_from else {}
+        max_image_bytes = self.max_image_bytes
+
+        # Images come from the CDN, so they are retried but not held to the API rate limit
+        response = self.get_steamgriddb_client().request(
+            url, headers=headers, stream=True, rate_limited=False
+        )
+        with response:
+            if response.status_code == 416 and resume_from:
+                # The part file is already complete or the image changed; start over
+                os.remove(part_path)
+                return self._stream_to_part_file(url, part_path)
+            if response.status_code == 206 and resume_from:
+                content_range = response.headers.get('Content-Range', '')
+                if not content_range.startswith(f'bytes {resume_from}-'):
+                    raise DownloadError(f"Unexpected Content-Range {content_range!r}")
+                mode = 'ab'
+                logger.info(f"Resuming download of {url} at byte {resume_from}")
+            elif response.status_code == 200:
+                resume_from = 0
+                mode = 'wb'
+            else:
+                raise DownloadError(f"Status Code: {response.status_code}")
+
+            content_length = response.headers.get('Content-Length')
+            expected_size = resume_from + int(content_length) if content_length else None
+            if expected_size is not None and expected_size > max_image_bytes:
+                raise DownloadError(
+                    f"Image is {expected_size} bytes, over the {max_image_bytes} byte limit"
+                )
+
+            downloaded = 0
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.download_chunk_size):
+                    downloaded += len(chunk)
+                    if resume_from + downloaded > max_image_bytes:
+                        raise DownloadError(f"Image exceeds the {max_image_bytes} byte limit")
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            metrics.count('bytes_downloaded', downloaded)
+
+            total_size = resume_from + downloaded
+            if expected_size is not None and total_size != expected_size:
+                raise DownloadError(f"Got {total_size} bytes, expected {expected_size}")
+
+            content_md5 = response.headers.get('Content-MD5')
+            if content_md5 and resume_from == 0:
+                digest = hashlib.md5()
+                with open(part_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(self.download_chunk_size), b''):
+                        digest.update(chunk)
+                if base64.b64encode(digest.digest()).decode('ascii') != content_md5:
+                    raise DownloadError("Content-MD5 does not match")
+        return downloaded
+
+    def download_image(self, url, local_path):
+        """Download an image from URL and save it locally.
+
+        The image is streamed in chunks to a .part file next to local_path and
+        renamed into place only once it is complete and verified, so an
+        interrupted run never leaves a truncated image behind. A leftover .part
+        file is resumed with a Range request.
+        """
+        part_path = f"{local_path}.part"
+        try:
+            with metrics.phase('download'):
+                self._stream_to_part_file(url, part_path)
+                os.replace(part_path, local_path)
+            logger.info(f"Downloaded image from {url} to {local_path}")
+            return True
+        except DownloadError as e:
+            logger.error(f"Failed to download image from {url}: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        except Exception as e:
+            logger.error(f"Failed to download image from {url}: {e}")
+        return False
+
+    # Artwork
+
+    def store_image(self, url, extension):
+        """Return the path of an image in the shared store, downloading it if needed.
+
+        Concurrent calls for the same URL (two games with the same artwork)
+        wait for the first one instead of streaming into the same part file.
+        """
+        with self._store_downloads_lock:
+            future = self._store_downloads.get(url)
+            owner = future is None
+            if owner:
+                future = self._store_downloads[url] = Future()
+        if not owner:
+            metrics.count('coalesced_requests')
+            return future.result()
+
+        try:
+            stored_path = self._store_image(url, extension)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(stored_path)
+            return stored_path
+        finally:
+            with self._store_downloads_lock:
+                del self._store_downloads[url]
+
+    def _store_image(self, url, extension):
+        """Download an image into the shared store unless it is already there."""
+        store = self.get_image_store()
+        stored_path = store.lookup(url)
+        if stored_path:
+            logger.info(f"Using stored image for {url}")
+            return stored_path
+        download_path = store.download_path(url, extension)
+        if not self.download_image(url, download_path):
+            return None
+        return store.add(url, download_path)
+
+    def postprocess_image(self, path, image_type):
+        """Downscale or re-encode an image as set in [Images].
+
+        Returns the processed file, which is shared and must be placed rather
+        than moved, or None if the image is to be used as it is.
+        """
+        processor = self.get_image_processor()
+        if processor is None:
+            return None
+        try:
+            with metrics.phase('postprocess'):
+                processed_path = processor.process(path, image_type)
+        except Exception as e:
+            logger.error(f"Failed to post-process {image_type} image {path}: {e}")
+            return None
+        if processed_path is not None:
+            size, processed_size = os.path.getsize(path), os.path.getsize(processed_path)
+            metrics.count('images_processed')
+            metrics.count('image_bytes_saved', max(0, size - processed_size))
+            logger.info(
+                f"Post-processed {image_type} image {os.path.basename(path)}: "
+                f"{size} -> {processed_size} bytes"
+            )
+        return processed_path
+
+    def save_images(self, appid, game_id, image_types=IMAGE_TYPES, manifests=None):
+        """Save grid, hero, and logo images (or only the given types) for the game.
+
+        manifests are the grid folders to fill, one per account. An image the
+        local catalog has a file for is placed from that file. In all-accounts
+        mode each image is downloaded once into the shared image store and
+        hardlinked (or copied) into every grid folder missing it. In offline
+        mode nothing is downloaded; only catalog and already stored images are
+        placed. With post-processing on, each image is downscaled or re-encoded
+        before it is placed, so the grid folder only ever gets the result.
+        Returns the number of images saved.
+        """
+        manifests = manifests or [self.artwork_manifest]
+        catalog = self.get_catalog()
+        catalog_images = catalog.images(game_id) if catalog is not None else {}
+        saved = 0
+        for image_type in image_types:
+            stored_path = catalog_images.get(image_type)
+            if stored_path:
+                url = None
+                extension = os.path.splitext(stored_path)[1]
+            else:
+                url = self.fetch_steamgriddb_image(game_id, image_type)
+                if not url:
+                    continue
+                extension = os.path.splitext(url)[1]
+            targets = [
+                manifest for manifest in manifests if image_type in manifest.missing(appid)
+            ]
+
+            if url is None:
+                logger.info(f"Using catalog {image_type} image {stored_path} for appid {appid}")
+            elif self.offline:
+                stored_path = (self.get_image_store().lookup(url)
+                               if self.all_accounts_mode else None)
+                if stored_path is None:
+                    logger.info(f"Offline: skipping download of {image_type} image {url}")
+                    continue
+            elif not self.all_accounts_mode:
+                for manifest in targets:
+                    file_name = artwork_filename(appid, image_type, extension)
+                    image_path = os.path.join(manifest.folder, file_name)
+                    logger.info(
+                        f"Saving {image_type} image for appid {appid} from {url} to {image_path}"
+                    )
+                    if not self.download_image(url, image_path):
+                        continue
+                    logger.info(f"Downloaded {image_type} image for appid {appid} from {url}")
+                    processed_path = self.postprocess_image(image_path, image_type)
+                    if processed_path is not None:
+                        file_name = artwork_filename(
+                            appid, image_type, os.path.splitext(processed_path)[1]
+                        )
+                        try:
+                            place_file(processed_path, os.path.join(manifest.folder, file_name))
+                        except OSError as e:
+                            logger.error(f"Failed to place processed {image_type} image: {e}")
+                            file_name = os.path.basename(image_path)
+                        else:
+                            if file_name != os.path.basename(image_path):
+                                os.remove(image_path)
+                    manifest.add(appid, image_type, file_name)
+                    saved += 1
+                continue
+            else:
+                stored_path = self.store_image(url, extension)
+                if stored_path is None:
+                    continue
+            processed_path = self.postprocess_image(stored_path, image_type)
+            if processed_path is not None:
+                stored_path = processed_path
+                extension = os.path.splitext(processed_path)[1]
+            file_name = artwork_filename(appid, image_type, extension)
+            for manifest in targets:
+                image_path = os.path.join(manifest.folder, file_name)
+                try:
+                    how = place_file(stored_path, image_path)
+                except OSError as e:
+                    logger.error(f"Failed to place {image_type} image at {image_path}: {e}")
+                    continue
+                metrics.count('images_linked' if how == 'link' else 'images_copied')
+                manifest.add(appid, image_type, file_name)
+                saved += 1
+                logger.info(
+                    f"Saved {image_type} image for appid {appid} to {image_path} ({how})"
+                )
+        return saved
+
+    def fetch_artwork(self, appid, game_name, manifests=None, game_id=None):
+        """Search SteamGridDB for a game and save the images it is still missing.
+
+        With several manifests, an image is fetched if any of them lacks it.
+        A known game_id skips the search. Returns a dict with the SteamGridDB
+        game id, the number of images saved and the image types still missing.
+        """
+        manifests = manifests or [self.artwork_manifest]
+
+        def still_missing():
+            return [
+                image_type for image_type in IMAGE_TYPES
+                if any(image_type in manifest.missing(appid) for manifest in manifests)
+            ]
+
+        outcome = {'game_id': game_id, 'images_saved': 0, 'missing': still_missing()}
+        if not outcome['missing']:
+            logger.info(f"All artwork for {game_name} is already present. Skipping.")
+            return outcome
+        if game_id is None:
+            outcome['game_id'] = game_id = self.search_steamgriddb_game(game_name)
+            if game_id is None:
+                return outcome
+        outcome['images_saved'] = self.save_images(appid, game_id, outcome['missing'], manifests)
+        outcome['missing'] = still_missing()
+        return outcome
+
+    def artwork_appid(self, shortcut):
+        """Return the appid a shortcut's artwork is saved under.
+
+        Entries without an appid use generate_appid() of their name and of
+        their exe as stored in shortcuts.vdf, quotes and case included. That
+        differs from the appid this tool gives a shortcut it creates, which
+        hashes the unquoted, lowercase exe path; it is kept so the artwork
+        earlier --backfill-artwork runs saved under it stays in use.
+        """
+        from GameSync_Shortcuts import shortcut_appid
+
+        return shortcut_appid(
+            shortcut,
+            lambda: generate_appid(shortcut.get('appname', '').strip(), shortcut.get('exe', ''))
+        )
+
+    def find_shortcuts_missing_artwork(self, shortcut_index, manifest=None):
+        """Return (appid, name) pairs of existing shortcuts that lack some artwork."""
+        manifest = manifest or self.artwork_manifest
+        pending = []
+        for _, shortcut in shortcut_index.items():
+            appname = shortcut.get('appname', '').strip()
+            if not appname:
+                continue
+            appid = self.artwork_appid(shortcut)
+            if manifest.missing(appid):
+                pending.append((appid, appname))
+        return pending
+
+    def fetch_artwork_concurrently(self, pending_artwork, game_ids=None, on_done=None,
+                                   cancel=None):
+        """Fetch artwork for many games at once on a bounded thread pool.
+
+        pending_artwork holds (appid, name, manifests) tuples. Each task runs
+        the search, metadata lookups and downloads for one game, so the pool
+        keeps up to max_concurrent_requests games in flight. game_ids maps
+        appids to SteamGridDB ids that are already known. on_done is called
+        on this thread as (appid, outcome) when a game is finished, with the
+        result of fetch_artwork() or None if it failed. Returns a dict with
+        the number of images saved and the names of the games whose artwork
+        failed. Setting the cancel event stops the run with SyncCancelled.
+        """
+        game_ids = game_ids or {}
+        result = {'games': len(pending_artwork), 'images_saved': 0, 'failed': []}
+        if not pending_artwork:
+            return result
+
+        logger.info(
+            f"Fetching artwork for {len(pending_artwork)} games "
+            f"with {self.max_concurrent_requests} workers..."
+        )
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            futures = {
+                executor.submit(
+                    self.fetch_artwork, appid, game_name, manifests, game_ids.get(appid)
+                ): (appid, game_name)
+                for appid, game_name, manifests in pending_artwork
+            }
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    appid, game_name = futures[future]
+                    try:
+                        outcome = future.result()
+                        result['images_saved'] += outcome['images_saved']
+                    except Exception as e:
+                        logger.error(f"Error fetching artwork for {game_name}: {e}")
+                        result['failed'].append(game_name)
+                        outcome = None
+                    if on_done is not None:
+                        on_done(appid, outcome)
+                    self.report_progress('artwork', done, len(futures))
+                    if cancel is not None and cancel.is_set():
+                        raise SyncCancelled("Artwork fetching was cancelled")
+            except BaseException:
+                # Drop the games not started yet instead of waiting for all of
+                # them on the way out of an error or Ctrl+C
+                for future in futures:
+                    future.cancel()
+                raise
+        return result
+
+    # Exe selection
+
+    def get_desktop_shortcuts(self):
+        """Return a dictionary of normalized desktop shortcut names to their targets."""
+        return self.desktop_shortcut_index.shortcuts()
+
+    def prioritize_exes(self, game_name, exe_stats, limit=None):
+        """Prioritize .exe files by name match, size and what their PE headers say.
+
+        exe_stats maps exe paths to their (size, mtime) from a scan. With a
+        limit, only the best `limit` exes are returned.
+        """
+        return self.exe_ranker.rank(game_name, exe_stats, limit=limit)
+
+    def get_scan_settings(self, installation_path):
+        """Return the (ignore matcher, max depth) used for an installation path."""
+        config = self.config
+        with self._scan_settings_lock:
+            if installation_path not in self._scan_settings:
+                section = f'Scan {installation_path}'
+                if not config.has_section(section):
+                    section = 'Scan'
+                ignore_globs = config.get(section, 'ignore_globs', fallback=None)
+                if ignore_globs is None:
+                    ignore_globs = config.get('Scan', 'ignore_globs',
+                                              fallback=','.join(DEFAULT_IGNORE_GLOBS))
+                max_depth = config.getint(
+                    section, 'max_depth', fallback=config.getint('Scan', 'max_depth', fallback=8)
+                )
+                self._scan_settings[installation_path] = (
+                    compile_ignore_globs(ignore_globs.split(',')), max_depth
+                )
+            return self._scan_settings[installation_path]
+
+    def scan_game_folder(self, game_dir, game_name):
+        """Walk a game folder and return its best candidate exes as [path, size, mtime].
+
+        Only the top max_exe_candidates exes are kept, best first. The result is
+        also recorded in the library snapshot. Returns None if the folder cannot
+        be read.
+        """
+        is_ignored, max_depth = self.get_scan_settings(os.path.dirname(game_dir))
+        with metrics.phase('scan'):
+            try:
+                result = scan_exes(game_dir, is_ignored, max_depth)
+            except Exception as e:
+                logger.error(f"Error accessing game directory {game_dir}: {e}")
+                return None
+            metrics.count('dirs_visited', result.dirs_visited)
+            metrics.count('files_statted', result.files_statted)
+
+            exe_records = {exe: [exe, size, mtime] for exe, size, mtime in result.exes}
+            exe_stats = {exe: (size, mtime) for exe, size, mtime in result.exes}
+            best_exes = self.prioritize_exes(
+                game_name, exe_stats, limit=self.max_exe_candidates
+            )
+        candidates = [exe_records[exe] for exe in best_exes]
+        self.library_snapshot.set_game(game_dir, candidates, result.dir_mtimes)
+        return candidates
+
+    def get_candidate_exes(self, game_dir, game_name):
+        """Return a game folder's candidate exes, from the snapshot if it is unchanged."""
+        snapshot_entry = self.library_snapshot.get_game(game_dir)
+        if snapshot_entry:
+            return snapshot_entry['exes']
+        return self.scan_game_folder(game_dir, game_name)
+
+    def collect_candidate_exes(self, games):
+        """Find the candidate exes of many (game_name, game_dir) pairs in parallel.
+
+        Returns a dict of game_dir to its candidates (None if it could not be read).
+        """
+        if not games:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+            futures = {
+                executor.submit(self.get_candidate_exes, game_dir, game_name): game_dir
+                for game_name, game_dir in games
+            }
+            candidates = {}
+            for done, future in enumerate(as_completed(futures), 1):
+                candidates[futures[future]] = future.result()
+                self.report_progress('scan', done, len(futures))
+            return candidates
+
+    def has_known_exe(self, game_name):
+        """Return True if a game's exe comes from a saved choice or desktop shortcut."""
+        sources = ('selective',) if self.selective_mode else None
+        return (self.exe_choice_store.has(game_name, sources=sources)
+                or self.desktop_shortcut_index.lookup(game_name) is not None)
+
+    def prompt_exe_choices(self, choices):
+        """Ask on the console which exe to use for each ambiguous game, in one session.
+
+        Every game is shown with its candidates, best first, and their sizes.
+        Console log lines are held back while the user answers, since the
+        artwork of the other games downloads meanwhile, and shown afterwards.
+        Returns a dict of game name to chosen exe, None if it was skipped.
+        """
+        held = []
+        holds = []
+        for handler in logging.getLogger().handlers:
+            if (isinstance(handler, logging.StreamHandler)
+                    and getattr(handler, 'stream', None) in (sys.stdout, sys.stderr)):
+                def hold(record, handler=handler):
+                    held.append((handler, record))
+                    return False
+                handler.addFilter(hold)
+                holds.append((handler, hold))
+
+        chosen = {}
+        try:
+            print(f"\nSeveral .exe files were found for {len(choices)} games. "
+                  f"Choose one for each (press Enter to skip a game):")
+            for number, choice in enumerate(choices, 1):
+                candidates = choice['candidates']
+                print(f"\n[{number}/{len(choices)}] {choice['name']}")
+                for i, candidate in enumerate(candidates, 1):
+                    size_mb = candidate['size'] / (1024 * 1024)
+                    print(f"  {i:>2}: {size_mb:>9.1f} MB  {candidate['exe']}")
+                while True:
+                    answer = input("Enter the number of the .exe file to use: ").strip()
+                    if not answer:
+                        chosen[choice['game']] = None
+                        break
+                    try:
+                        index = int(answer) - 1
+                    except ValueError:
+                        print("Please enter a valid number.")
+                        continue
+                    if 0 <= index < len(candidates):
+                        chosen[choice['game']] = candidates[index]['exe']
+                        break
+                    print("Invalid choice, try again.")
+        finally:
+            for handler, hold in holds:
+                handler.removeFilter(hold)
+            for handler, record in held:
+                handler.handle(record)
+        return chosen
+
+    def resolve_exe_choices(self, choices):
+        """Let the user pick the exes of ambiguous games in one session and remember them.
+
+        Returns a dict of game name to chosen exe, None for skipped games.
+        """
+        choose_exes = self.choose_exes or self.prompt_exe_choices
+        answers = choose_exes(choices) or {}
+        chosen = {}
+        for choice in choices:
+            game_name = choice['game']
+            candidate = next((candidate for candidate in choice['candidates']
+                              if candidate['exe'] == answers.get(game_name)), None)
+            if candidate is None:
+                logger.info(f"No .exe chosen for {game_name}. Skipping.")
+                chosen[game_name] = None
+                continue
+            # Remember the user's choice
+            self.exe_choice_store.set(
+                game_name, candidate['exe'], 'selective', candidate['size'], candidate['mtime']
+            )
+            self.library_snapshot.set_chosen(choice['game_dir'], candidate['exe'])
+            chosen[game_name] = candidate['exe']
+        return chosen
+
+    def find_largest_exe(self, game_dir, game_name, existing_in_steam, candidates=None,
+                         choices=None):
+        """Find the best .exe file for the game, considering various factors.
+
+        candidates may hold the game folder's candidate exes as [path, size, mtime]
+        if they were already collected; otherwise the folder is scanned here.
+        In selective mode a game with several candidates is ambiguous: if a
+        choices list is given, the game is appended to it for a later batch
+        session and None is returned; otherwise the user is asked right away.
+        """
+        if existing_in_steam:
+            logger.info(f"Game {game_name} already exists in Steam. Skipping .exe selection.")
+            return None
+
+        # Reuse a previous choice if the exe is unchanged. Selective mode only trusts
+        # choices the user made, so automatic picks are still offered for review.
+        sources = ('selective',) if self.selective_mode else None
+        saved_exe_path = self.exe_choice_store.get(game_name, sources=sources)
+        if saved_exe_path:
+            logger.info(f"Using saved .exe for {game_name}: {saved_exe_path}")
+            return saved_exe_path
+
+        # Check for a matching shortcut on the desktop
+        shortcut_target = self.desktop_shortcut_index.lookup(game_name)
+        if shortcut_target and os.path.exists(shortcut_target):
+            logger.info(
+                f"Found desktop shortcut for {game_name}, prioritizing {shortcut_target}"
+            )
+            self.exe_choice_store.set(game_name, shortcut_target, 'automatic')
+            return shortcut_target
+
+        # Reuse the candidates from the last run if the folder is unchanged
+        if candidates is None:
+            candidates = self.get_candidate_exes(game_dir, game_name)
+            if candidates is None:
+                return None
+        exe_stats = {exe: (size, mtime) for exe, size, mtime in candidates}
+
+        # Prioritize based on name match, size and the exes' PE headers
+        with metrics.phase('rank'):
+            sorted_exes = self.prioritize_exes(game_name, exe_stats)
+
+        # If multiple .exe files are found and selective mode is on, the user chooses
+        if self.selective_mode and len(sorted_exes) > 1:
+            choice = {
+                'game': game_name,
+                'name': capitalize_game_name(game_name),
+                'game_dir': game_dir,
+                'candidates': [
+                    {'exe': exe, 'size': exe_stats[exe][0], 'mtime': exe_stats[exe][1]}
+                    for exe in sorted_exes
+                ],
+            }
+            if choices is not None:
+                choices.append(choice)
+                return None
+            return self.resolve_exe_choices([choice])[game_name]
+
+        # Return the top prioritized exe file found (default mode)
+        if not sorted_exes:
+            return None
+        self.exe_choice_store.set(
+            game_name, sorted_exes[0], 'automatic', *exe_stats[sorted_exes[0]]
+        )
+        self.library_snapshot.set_chosen(game_dir, sorted_exes[0])
+        return sorted_exes[0]
+
+    # Plan and apply
+
+    def plan_sync(self, current_games, account=None, shortcut_index=None):
+        """Work out what a sync of one account would change, using only the local filesystem.
+
+        Returns a JSON-ready plan with the shortcuts to add (with their chosen
+        exe and generated appid), the artwork to fetch, the games skipped
+        and why, and under 'choose' the games of selective mode whose exe
+        the user still has to pick, each with its ranked candidates. A game
+        whose exe is the one of a created shortcut that moved away (same
+        fingerprint, or same name) is planned under 'move' instead of 'add'.
+        Nothing is downloaded and shortcuts.vdf is not written.
+        """
+        account = account or self.default_account()
+        if shortcut_index is None:
+            shortcut_index = self.open_shortcuts(account.shortcuts_file)
+        manifest = self.get_artwork_manifest(account.grid_folder)
+        plan = {
+            'account': account.account_id,
+            'shortcuts_file': account.shortcuts_file,
+            'grid_folder': account.grid_folder,
+            'add': [],
+            'artwork': [],
+            'skip': [],
+            'choose': [],
+            'move': [],
+        }
+        planned_exes = set()
+        moved = self.find_moved_installs(shortcut_index)
+
+        def in_steam(game_name):
+            # A shortcut whose exe moved away is looked for again
+            key = shortcut_index.find_by_name(game_name)
+            return key is not None and key not in moved['keys']
+
+        # Walk the folders of all new games in parallel before ranking them
+        candidates = self.collect_candidate_exes([
+            (game_name, self.game_folder_paths[game_name]) for game_name in current_games
+            if game_name in self.game_folder_paths
+            and not in_steam(game_name)
+            and not self.has_known_exe(game_name)
+        ])
+
+        for done, game_name in enumerate(sorted(current_games)):
+            self.report_progress('rank', done, len(current_games))
+            if self.checkpoint_due():
+                self.checkpoint()
+            game_path = self.game_folder_paths.get(game_name)
+
+            # Find which installation path the game is in
+            if not game_path:
+                for installation_path in self.game_installation_paths:
+                    potential_game_path = os.path.join(installation_path, game_name)
+                    if os.path.exists(potential_game_path):
+                        game_path = potential_game_path
+                        break
+
+            if not game_path:
+                logger.error(f"Could not find game path for {game_name}")
+                plan['skip'].append({'game': game_name, 'reason': 'game_path_not_found'})
+                continue
+
+            # Check if the game already exists in Steam
+            existing_in_steam = in_steam(game_name)
+
+            waiting = len(plan['choose'])
+            exe_file = self.find_largest_exe(
+                game_path, game_name, existing_in_steam, candidates.get(game_path),
+                plan['choose']
+            )
+            if len(plan['choose']) > waiting:
+                continue  # The user picks its exe together with the other ambiguous games
+            if existing_in_steam or exe_file is None:
+                logger.info(
+                    f"Game {game_name} already exists in Steam or no exe selected. Skipping."
+                )
+                reason = 'already_in_steam' if existing_in_steam else 'no_exe'
+                plan['skip'].append({'game': game_name, 'reason': reason})
+                continue
+
+            self.plan_game(plan, game_name, game_path, exe_file, shortcut_index, manifest,
+                           planned_exes, moved)
+
+        # Repair missing artwork of shortcuts that were already in Steam
+        if self.backfill_artwork:
+            backfill = self.find_shortcuts_missing_artwork(shortcut_index, manifest)
+            new_appids = {item['appid'] for item in plan['artwork']}
+            plan['artwork'].extend(
+                {'appid': appid, 'name': name, 'missing': manifest.missing(appid)}
+                for appid, name in backfill if appid not in new_appids
+            )
+            logger.info(f"Backfilling artwork for {len(backfill)} existing shortcuts.")
+
+        self.report_progress('rank', len(current_games), len(current_games))
+        return plan
+
+    def plan_game(self, plan, game_name, game_path, exe_file, shortcut_index, manifest,
+                  planned_exes, moved=None):
+        """Add a game with its chosen exe to an account plan, unless its exe is in Steam.
+
+        moved is the result of find_moved_installs(); a game found there is
+        planned as a move of its existing shortcut.
+        """
+        from GameSync_Shortcuts import normalize_appid
+
+        exe_path = exe_file.lower()
+
+        # Check if another shortcut already launches the same exe
+        if shortcut_index.find_by_exe(exe_path) is not None or exe_path in planned_exes:
+            logger.info(f"Game {game_name} already exists in Steam. Skipping.")
+            plan['skip'].append({'game': game_name, 'reason': 'exe_already_in_steam',
+                                 'exe': exe_path})
+            return
+        planned_exes.add(exe_path)
+
+        # Capitalize the game name before adding to Steam
+        game_name_capitalized = capitalize_game_name(game_name)
+        appid = generate_appid(game_name_capitalized, exe_path)
+
+        moved_key = self.find_moved_shortcut(game_name, exe_file, shortcut_index, moved)
+        if moved_key is not None:
+            old_appid = normalize_appid(shortcut_index.get(moved_key).get('appid'))
+            plan['move'].append({
+                'game': game_name,
+                'appname': game_name_capitalized,
+                'appid': appid,
+                'old_appid': old_appid,
+                'exe': exe_file,
+                'start_dir': game_path,
+            })
+            # Only the images the old appid lacks are fetched; the rest are renamed
+            plan['artwork'].append({
+                'appid': appid,
+                'name': game_name_capitalized,
+                'missing': [image_type for image_type in manifest.missing(old_appid)
+                            if image_type in manifest.missing(appid)],
+            })
+            return
+
+        plan['add'].append({
+            'game': game_name,
+            'appname': game_name_capitalized,
+            'appid': appid,
+            'exe': exe_file,
+            'start_dir': game_path,
+        })
+        plan['artwork'].append({
+            'appid': appid,
+            'name': game_name_capitalized,
+            'missing': manifest.missing(appid),
+        })
+
+    def plan_chosen(self, plans, chosen, shortcut_indexes=None):
+        """Return account plans adding the ambiguous games of plans with their chosen exes.
+
+        chosen maps game names to exes as returned by resolve_exe_choices().
+        """
+        shortcut_indexes = shortcut_indexes or {}
+        chosen_plans = []
+        for plan in plans:
+            shortcut_index = (shortcut_indexes.get(plan['shortcuts_file'])
+                              or self.open_shortcuts(plan['shortcuts_file']))
+            manifest = self.get_artwork_manifest(plan['grid_folder'])
+            chosen_plan = dict(plan, add=[], artwork=[], skip=[], choose=[], move=[])
+            planned_exes = set()
+            moved = self.find_moved_installs(shortcut_index)
+            for choice in plan.get('choose', []):
+                exe_file = chosen.get(choice['game'])
+                if exe_file is None:
+                    chosen_plan['skip'].append({'game': choice['game'], 'reason': 'no_exe'})
+                    continue
+                self.plan_game(chosen_plan, choice['game'], choice['game_dir'], exe_file,
+                               shortcut_index, manifest, planned_exes, moved)
+            chosen_plans.append(chosen_plan)
+        return chosen_plans
+
+    def locate_exe(self, exe):
+        """Return the path of a shortcut's exe as it is on disk, or None if it is gone.
+
+        Inside an installation directory the lowercase path of a shortcut is
+        matched without case, so this also works on case-sensitive file systems.
+        """
+        if os.path.exists(exe):
+            return exe
+        exe_key = os.path.normcase(os.path.abspath(exe)).lower()
+        for installation_path in self.game_installation_paths:
+            root_key = os.path.normcase(os.path.abspath(installation_path)).lower()
+            if exe_key.startswith(root_key + os.sep):
+                return find_ignoring_case(
+                    installation_path, exe_key[len(root_key) + 1:].split(os.sep)
+                )
+        return None
+
+    def find_moved_installs(self, shortcut_index):
+        """Fingerprint the exes of created shortcuts and return the shortcuts whose exe is gone.
+
+        Exes that exist are recorded in the install index; an unchanged exe
+        costs one stat, new or updated ones are hashed in parallel. Returns
+        a dict with the keys of the shortcuts whose exe is missing ('keys'),
+        the recorded fingerprints of their exes ('fingerprints', fingerprint
+        -> key) and the sizes in those fingerprints ('sizes').
+        """
+        from GameSync_Shortcuts import normalize_appid, normalize_exe
+
+        moved = {'keys': set(), 'fingerprints': {}, 'sizes': set()}
+        present = {}  # appid -> exe path on disk
+        for key, entry in shortcut_index.items():
+            appid = normalize_appid(entry.get('appid'))
+            recorded = self.install_index.get(appid) if appid else None
+            if recorded is None and not self.is_created_shortcut(entry):
+                continue
+            exe = self.locate_exe(normalize_exe(entry.get('exe', '')))
+            if exe is not None:
+                present[appid] = exe
+                continue
+            moved['keys'].add(key)
+            if recorded is not None:
+                moved['fingerprints'][recorded['fingerprint']] = key
+                moved['sizes'].add(fingerprint_size(recorded['fingerprint']))
+        if present:
+            with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+                list(executor.map(self.install_index.update, present, present.values()))
+        return moved
+
+    def find_moved_shortcut(self, game_name, exe_file, shortcut_index, moved):
+        """Return the key of the created shortcut a game's exe moved from, or None.
+
+        A shortcut whose exe is gone matches if that exe had the same
+        fingerprint as exe_file, or else if it has the game's name. The new
+        exe is only hashed if its size is one of a missing exe. A matched
+        shortcut is taken out of moved, so it moves to one place only.
+        """
+        if not moved or not moved['keys']:
+            return None
+        key = None
+        try:
+            if os.path.getsize(exe_file) in moved['sizes']:
+                key = moved['fingerprints'].get(fingerprint_file(exe_file))
+        except OSError:
+            pass
+        if key is None:
+            key = shortcut_index.find_by_name(game_name)
+            if key not in moved['keys']:
+                return None
+        moved['keys'].discard(key)
+        moved['fingerprints'] = {
+            fingerprint: other for fingerprint, other in moved['fingerprints'].items()
+            if other != key
+        }
+        return key
+
+    def move_shortcut(self, item, shortcut_index, manifest, artwork):
+        """Point the shortcut of a moved game at its new exe and rename its grid images.
+
+        The entry keeps its place in shortcuts.vdf and gets the appid of the
+        new exe. artwork is the list_artwork() listing of the account's grid
+        folder. Returns True if the shortcut was updated.
+        """
+        key = shortcut_index.find_by_appid(item['old_appid'])
+        if key is None:
+            logger.info(f"Shortcut of {item['appname']} is no longer in Steam. Skipping move.")
+            return False
+        if not os.path.exists(item['exe']):
+            logger.warning(f"Planned exe {item['exe']} no longer exists. Skipping move.")
+            return False
+
+        shortcut_index.update(
+            key,
+            appid=item['appid'],
+            appname=item['appname'],
+            exe=f'"{item["exe"].lower()}"',
+            StartDir=f'"{item["start_dir"]}"',
+        )
+        renamed = 0
+        for file_name, _, _ in artwork.pop(item['old_appid'], []):
+            new_name = item['appid'] + file_name[len(item['old_appid']):]
+            try:
+                os.replace(os.path.join(manifest.folder, file_name),
+                           os.path.join(manifest.folder, new_name))
+            except OSError as e:
+                logger.error(f"Failed to rename image {file_name} to {new_name}: {e}")
+                continue
+            manifest.add(item['appid'], parse_artwork_filename(new_name)[1], new_name)
+            renamed += 1
+        manifest.forget(item['old_appid'])
+        metrics.count('shortcuts_moved')
+        metrics.count('images_renamed', renamed)
+
+        self.install_index.forget(item['old_appid'])
+        self.install_index.update(item['appid'], item['exe'])
+        logger.info(
+            f"Moved shortcut for {item['appname']} to {item['exe']}; "
+            f"renamed {renamed} images to appid {item['appid']}."
+        )
+        return True
+
+    def make_plan(self, current_games, accounts=None, shortcut_indexes=None):
+        """Plan the sync of every account of this engine; see plan_sync()."""
+        accounts = self.get_accounts() if accounts is None else accounts
+        shortcut_indexes = shortcut_indexes or {}
+        return {
+            'version': PLAN_VERSION,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'accounts': [
+                self.plan_sync(
+                    current_games, account, shortcut_indexes.get(account.shortcuts_file)
+                )
+                for account in accounts
+            ],
+        }
+
+    def add_planned_shortcut(self, item, shortcut_index):
+        """Add one planned shortcut if it is still missing; return True if it was added."""
+        if shortcut_index.find_by_name(item['game']) is not None:
+            logger.info(f"Game {item['game']} already exists in Steam. Skipping.")
+            return False
+        if shortcut_index.find_by_exe(item['exe']) is not None:
+            logger.info(f"Game {item['game']} already exists in Steam. Skipping.")
+            return False
+        if not os.path.exists(item['exe']):
+            logger.warning(f"Planned exe {item['exe']} no longer exists. Skipping.")
+            return False
+
+        # Add shortcut entry
+        new_entry = {
+            "appid": item['appid'],
+            "appname": item['appname'],
+            "exe": f'"{item["exe"].lower()}"',
+            "StartDir": f'"{item["start_dir"]}"',
+            "LaunchOptions": "",
+            "IsHidden": 0,
+            "AllowDesktopConfig": 1,
+            "OpenVR": 0,
+            "Devkit": 0,
+            "DevkitGameID": "",
+            "LastPlayTime": 0,
+            "tags": {}
+        }
+        shortcut_index.add(new_entry)
+        self.install_index.update(item['appid'], item['exe'])
+        logger.info(f"Added shortcut for game: {item['appname']}")
+        return True
+
+    def add_planned_shortcuts(self, plan, shortcut_index):
+        """Add the shortcuts of an account plan that are still missing.
+
+        Returns the appnames of the shortcuts added.
+        """
+        return [
+            item['appname'] for item in plan['add']
+            if self.add_planned_shortcut(item, shortcut_index)
+        ]
+
+    def apply_plans(self, plans, shortcut_indexes=None, cancel=None):
+        """Add the shortcuts of account plans and fetch their artwork, game by game.
+
+        Moved games are updated in place first. Artwork is fetched once per
+        game, however many accounts need it, and a game's shortcuts are
+        added when its artwork is done. Each finished
+        game is recorded in the run journal with its exe, appid, SteamGridDB
+        id and missing artwork. Changed shortcuts files are saved at every
+        checkpoint and when the run ends, even if it fails or is interrupted;
+        the next run reuses the SteamGridDB ids the interrupted one found.
+        Entries are checked again against the current shortcuts files, so
+        applying a plan twice, or after a normal run, adds nothing twice.
+        The games of a plan's 'choose' list are left out; see run_plans().
+        Returns a dict with the shortcuts added and moved per account and the
+        artwork result of fetch_artwork_concurrently().
+        """
+        shortcut_indexes = shortcut_indexes or {}
+        journal = RunJournal(self.state_path(run_journal_file))
+        game_ids = self.resume_game_ids(journal)
+        accounts = []  # (result, shortcut index) per account
+        games = {}  # appid -> name, manifests missing images and (item, account) to add
+        for plan in plans:
+            shortcut_index = (shortcut_indexes.get(plan['shortcuts_file'])
+                              or self.open_shortcuts(plan['shortcuts_file']))
+            result = {
+                'account': plan['account'],
+                'shortcuts_file': plan['shortcuts_file'],
+                'added': [],
+                'moved': [],
+                'skipped': plan['skip'],
+                'saved': False,
+            }
+            accounts.append((result, shortcut_index))
+
+            Path(plan['grid_folder']).mkdir(parents=True, exist_ok=True)
+            manifest = self.get_artwork_manifest(plan['grid_folder'])
+            # Moved games keep their shortcut and images, before any artwork is fetched
+            if plan.get('move'):
+                artwork_files = list_artwork(plan['grid_folder'])
+                for item in plan['move']:
+                    if self.move_shortcut(item, shortcut_index, manifest, artwork_files):
+                        result['moved'].append(item['appname'])
+            for item in plan['add']:
+                game = games.setdefault(
+                    item['appid'], {'name': item['appname'], 'manifests': [], 'add': []}
+                )
+                game['add'].append((item, result, shortcut_index))
+            for item in plan['artwork']:
+                game = games.setdefault(
+                    item['appid'], {'name': item['name'], 'manifests': [], 'add': []}
+                )
+                game['manifests'].append(manifest)
+
+        journal.begin(
+            created_at=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            games={appid: game['name'] for appid, game in games.items()},
+            game_ids={appid: game_ids[appid] for appid in games if appid in game_ids},
+        )
+
+        def finish_game(appid, outcome):
+            game = games[appid]
+            for item, result, shortcut_index in game['add']:
+                if self.add_planned_shortcut(item, shortcut_index):
+                    result['added'].append(item['appname'])
+            journal.record(
+                'game', appid=appid, name=game['name'],
+                exes=sorted({item['exe'] for item, _, _ in game['add']}),
+                game_id=outcome['game_id'] if outcome else game_ids.get(appid),
+                missing=outcome['missing'] if outcome else None,
+                failed=outcome is None,
+            )
+            if self.checkpoint_due():
+                self.checkpoint(accounts, journal)
+
+        try:
+            # Games without artwork to fetch are finished right away
+            for appid, game in games.items():
+                if not game['manifests']:
+                    finish_game(appid, {'game_id': None, 'images_saved': 0, 'missing': []})
+            # Fetch artwork for all games at once; images that arrived since the plan are skipped
+            artwork = self.fetch_artwork_concurrently(
+                [(appid, game['name'], game['manifests'])
+                 for appid, game in games.items() if game['manifests']],
+                game_ids, finish_game, cancel,
+            )
+        except BaseException:
+            # Keep the games finished so far and the journal for the next run
+            self.checkpoint(accounts, journal)
+            journal.close()
+            logger.warning("Sync interrupted; the next run resumes where this one stopped.")
+            raise
+
+        self.checkpoint(accounts, journal)
+        journal.finish()
+        for result, _ in accounts:
+            if result['saved']:
+                logger.info(f"Shortcuts file {result['shortcuts_file']} updated and saved.")
+            else:
+                logger.info(f"No new shortcuts; {result['shortcuts_file']} left unchanged.")
+        return {'accounts': [result for result, _ in accounts], 'artwork': artwork}
+
+    def run_plans(self, plans, shortcut_indexes=None):
+        """Apply account plans, letting the user pick the exes of ambiguous games meanwhile.
+
+        The games of the plans' 'choose' lists are offered in one session
+        while the rest of the plans is applied on a background thread, so
+        their artwork keeps downloading as the user decides. The chosen
+        games are applied afterwards. Returns the combined result of
+        apply_plans().
+        """
+        shortcut_indexes = dict(shortcut_indexes or {})
+        for plan in plans:
+            if plan['shortcuts_file'] not in shortcut_indexes:
+                shortcut_indexes[plan['shortcuts_file']] = self.open_shortcuts(
+                    plan['shortcuts_file']
+                )
+        # A game is chosen once, however many accounts are missing it
+        choices = list({
+            choice['game']: choice for plan in plans for choice in plan.get('choose', [])
+        }.values())
+        if not choices:
+            return self.apply_plans(plans, shortcut_indexes)
+
+        logger.info(
+            f"{len(choices)} games have several executables to choose from; "
+            f"the other games are added meanwhile."
+        )
+        cancel = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as background:
+            applying = background.submit(self.apply_plans, plans, shortcut_indexes, cancel)
+            try:
+                chosen = self.resolve_exe_choices(choices)
+            except BaseException:
+                cancel.set()
+                raise
+            result = applying.result()
+
+        chosen_plans = self.plan_chosen(plans, chosen, shortcut_indexes)
+        for account, plan in zip(result['accounts'], chosen_plans):
+            account['skipped'] = account['skipped'] + plan['skip']
+        if any(plan['add'] or plan['move'] for plan in chosen_plans):
+            extra = self.apply_plans(
+                [dict(plan, skip=[]) for plan in chosen_plans], shortcut_indexes
+            )
+            for account, added in zip(result['accounts'], extra['accounts']):
+                account['added'] += added['added']
+                account['moved'] += added['moved']
+                account['saved'] = account['saved'] or added['saved']
+            for key in ('games', 'images_saved', 'failed'):
+                result['artwork'][key] += extra['artwork'][key]
+        return result
+
+    def resume_game_ids(self, journal):
+        """Return the SteamGridDB ids (appid -> id) found by an interrupted previous run."""
+        previous = journal.interrupted()
+        if previous is None:
+            return {}
+        begin = previous['begin']
+        game_ids = dict(begin.get('game_ids', {}))
+        for record in previous['games']:
+            if record.get('game_id') is not None:
+                game_ids[record['appid']] = record['game_id']
+        logger.info(
+            f"Resuming the run started {begin.get('created_at')}: it finished "
+            f"{len(previous['games'])} of {len(begin.get('games', {}))} games; "
+            f"reusing {len(game_ids)} SteamGridDB ids."
+        )
+        return game_ids
+
+    def update_shortcuts(self, current_games):
+        """Update the Steam shortcuts with new games and fetch/update images.
+
+        Returns the result of run_plans().
+        """
+        # Load existing shortcuts (indexed by name, exe and appid) once per account
+        accounts = self.get_accounts()
+        shortcut_indexes = {
+            account.shortcuts_file: self.open_shortcuts(account.shortcuts_file)
+            for account in accounts
+        }
+        plan = self.make_plan(current_games, accounts, shortcut_indexes)
+        return self.run_plans(plan['accounts'], shortcut_indexes)
+
+    def sync(self):
+        """Read the installed games and add the missing ones to Steam.
+
+        Returns the result of apply_plans() with the games found under 'games'.
+        """
+        current_games = self.read_current_games()
+        logger.info(f"Current games: {current_games}")
+        result = self.update_shortcuts(current_games)
+        result['games'] = sorted(current_games)
+        return result
+
+    def plan(self):
+        """Read the installed games and return the plan of a sync, changing nothing."""
+        return self.make_plan(self.read_current_games())
+
+    # Prune
+
+    def is_created_shortcut(self, entry):
+        """Return True if a shortcuts.vdf entry was added by this tool.
+
+        Entries added here carry the appid generate_appid() made from their
+        name and exe, which shortcuts added through Steam never do.
+        """
+        from GameSync_Shortcuts import normalize_appid, normalize_exe
+
+        appname = entry.get('appname', '')
+        exe = normalize_exe(entry.get('exe', ''))
+        if not appname or not exe:
+            return False
+        return normalize_appid(entry.get('appid')) == generate_appid(appname, exe)
+
+    def find_stale_shortcuts(self, shortcut_index):
+        """Return the (key, entry) pairs of created shortcuts whose game is gone.
+
+        Only shortcuts launching an exe inside an installation directory
+        that was listed this run and can be read right now are considered,
+        so a disconnected drive never loses its shortcuts. A shortcut is
+        stale only if its exe is not on disk, checked under its own
+        installation directory whatever game the library found there.
+        """
+        from GameSync_Shortcuts import normalize_exe
+
+        def key_of(path):
+            return os.path.normcase(os.path.abspath(path)).lower()
+
+        roots = {
+            key_of(path): path for path in self.game_installation_paths
+            if path not in self.unreadable_paths and os.path.isdir(path)
+        }
+        stale = []
+        for key, entry in shortcut_index.items():
+            if not self.is_created_shortcut(entry):
+                continue
+            exe = normalize_exe(entry['exe'])
+            exe_key = key_of(exe)
+            root = next((root for root in roots if exe_key.startswith(root + os.sep)), None)
+            if root is None:
+                continue
+            parts = exe_key[len(root) + 1:].split(os.sep)
+            if not (os.path.exists(exe) or find_ignoring_case(roots[root], parts)):
+                stale.append((key, entry))
+        return stale
+
+    def prune_account(self, account, shortcut_index, dry_run=False):
+        """Remove an account's stale shortcuts and the grid images no shortcut uses.
+
+        The grid folder is listed once. Images of non-Steam appids that no
+        remaining shortcut has are orphans; Steam's own games are left alone.
+        Returns what was (or, with dry_run, would be) removed.
+        """
+        result = {
+            'account': account.account_id,
+            'shortcuts_file': account.shortcuts_file,
+            'removed_shortcuts': [],
+            'removed_images': [],
+            'reclaimed_bytes': 0,
+            'saved': False,
+        }
+        for key, entry in self.find_stale_shortcuts(shortcut_index):
+            result['removed_shortcuts'].append({
+                'appid': self.artwork_appid(entry),
+                'appname': entry.get('appname', ''),
+                'exe': entry.get('exe', '').strip('"'),
+            })
+            if not dry_run:
+                shortcut_index.remove(key)
+                self.install_index.forget(result['removed_shortcuts'][-1]['appid'])
+            logger.info(f"{'Would remove' if dry_run else 'Removed'} shortcut for "
+                        f"{entry.get('appname', '')}: its game is no longer installed.")
+
+        removed_appids = {item['appid'] for item in result['removed_shortcuts']}
+        in_use = {
+            self.artwork_appid(entry) for _, entry in shortcut_index.items()
+        } - (removed_appids if dry_run else set())
+        artwork = list_artwork(account.grid_folder)
+        manifest = self.get_artwork_manifest(account.grid_folder)
+        for appid in artwork.keys() - in_use:
+            if not int(appid) & NON_STEAM_APPID_BIT:
+                continue
+            for file_name, size, links in artwork[appid]:
+                if not dry_run:
+                    try:
+                        os.remove(os.path.join(account.grid_folder, file_name))
+                    except OSError as e:
+                        logger.error(f"Failed to remove orphaned image {file_name}: {e}")
+                        continue
+                result['removed_images'].append(file_name)
+                # A hardlinked image frees no space while the image store holds it
+                if links <= 1:
+                    result['reclaimed_bytes'] += size
+            if not dry_run:
+                manifest.forget(appid)
+
+        if not dry_run:
+            with metrics.phase('vdf_write'):
+                result['saved'] = shortcut_index.save()
+        return result
+
+    def prune(self, dry_run=False):
+        """Remove stale shortcuts and orphaned artwork from every account of this engine.
+
+        With dry_run nothing is changed and the result lists what would be
+        removed. Returns per-account results, the image store and processed
+        image files removed and the total bytes reclaimed.
+        """
+        if not self.library_read:
+            self.read_current_games()
+        accounts = [
+            self.prune_account(account, self.open_shortcuts(account.shortcuts_file), dry_run)
+            for account in self.get_accounts()
+        ]
+        store_files, store_bytes = [], 0
+        if os.path.isdir(self.image_store_folder):
+            store_files, store_bytes = self.get_image_store().prune(dry_run)
+        image_processor = self.get_image_processor()
+        if image_processor is not None:
+            processed_files, processed_bytes = image_processor.prune(dry_run)
+            store_files += processed_files
+            store_bytes += processed_bytes
+        return {
+            'dry_run': dry_run,
+            'accounts': accounts,
+            'store_files': store_files,
+            'reclaimed_bytes': store_bytes + sum(
+                account['reclaimed_bytes'] for account in accounts
+            ),
+        }
+
+    # State and reports
+
+    def flush_stores(self):
+        """Write the exe choices, the library snapshot and the caches if they changed.
+
+        Only the stores this engine loaded are written.
+        """
+        exe_choice_store = self._loaded('exe_choice_store')
+        if exe_choice_store is not None and exe_choice_store.flush():
+            logger.info(f"Saved exe choices to {exe_choices_file}.")
+        for name in ('library_snapshot', 'exe_info_cache', 'install_index', 'image_store',
+                     'image_processor'):
+            store = self._loaded(name)
+            if store is not None:
+                store.flush()
+
+    def checkpoint_due(self):
+        """Return True if checkpoint_seconds have passed since the last checkpoint."""
+        return time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds
+
+    def checkpoint(self, accounts=(), journal=None):
+        """Save the work of a run so far.
+
+        accounts are (result, shortcut index) pairs as in apply_plans();
+        each changed shortcuts file is saved and marked in its result. The
+        state stores are flushed and the journal forced to disk.
+        """
+        with metrics.phase('vdf_write'):
+            for result, shortcut_index in accounts:
+                if shortcut_index.save():
+                    result['saved'] = True
+                    logger.debug(f"Checkpoint: saved {result['shortcuts_file']}.")
+        self.flush_stores()
+        if journal is not None:
+            journal.sync()
+        self._last_checkpoint = time.monotonic()
+
+    def save_state(self):
+        """Persist the exe choices, the library snapshot and the caches.
+
+        Only the stores this engine loaded are written. Returns the library
+        scan statistics.
+        """
+        library_snapshot = self.library_snapshot
+        exe_info_cache = self._loaded('exe_info_cache')
+        if self.game_folder_paths:
+            library_snapshot.prune(self.game_folder_paths.values())
+            if exe_info_cache is not None:
+                exe_info_cache.prune(self.game_folder_paths.values())
+        self.flush_stores()
+        image_processor = self._loaded('image_processor')
+        if image_processor is not None:
+            image_processor.close()
+        logger.info(f"Library scan: {library_snapshot.summary()}.")
+        return dict(library_snapshot.stats)
+
+    def write_profile_report(self, path):
+        """Write the metrics of this run to a JSON report and return it."""
+        metrics.count('shortcuts_parsed', self.desktop_shortcut_index.parse_count)
+        return metrics.write_report(path, extra={
+            'selective_mode': self.selective_mode,
+            'library_snapshot': dict(self.library_snapshot.stats),
+        })
+
+    # Watch mode
+
+    def games_for_changes(self, paths):
+        """Return the lowercase names of the games affected by changed paths.
+
+        A path inside an installation directory affects the game folder it is
+        in. A changed Desktop shortcut affects the game whose name it matches.
+        """
+        games = set()
+        game_names = NameIndex(
+            ((game_name, game_name) for game_name in self.game_folder_paths), key=plain_key
+        )
+        for path in paths:
+            path = os.path.abspath(path)
+            for installation_path in self.game_installation_paths:
+                root = os.path.abspath(installation_path)
+                if not os.path.normcase(path).startswith(os.path.normcase(root) + os.sep):
+                    continue
+                games.add(path[len(root) + 1:].split(os.sep)[0].lower())
+                break
+            else:
+                name = os.path.basename(path)
+                if name.lower().endswith('.lnk'):
+                    game_name = game_names.lookup(name[:-len('.lnk')])
+                    if game_name:
+                        games.add(game_name)
+        return games
+
+    def refresh_game_folders(self, games):
+        """Update game_folder_paths for the given games and return those still installed."""
+        for game_name in games:
+            self.game_folder_paths.pop(game_name, None)
+        installed = set()
+        # The first installation path that has a game wins, as in read_current_games
+        for installation_path in self.game_installation_paths:
+            try:
+                folders = os.listdir(installation_path)
+            except OSError:
+                continue
+            for folder in folders:
+                game_name = folder.lower()
+                if game_name in games and game_name not in installed:
+                    game_dir = os.path.join(installation_path, folder)
+                    if os.path.isdir(game_dir):
+                        self.game_folder_paths[game_name] = game_dir
+                        installed.add(game_name)
+        return installed
+
+    def sync_changes(self, paths):
+        """Sync only the games affected by a batch of changed paths.
+
+        Returns the result of apply_plans(), or None if no installed game changed.
+        """
+        games = self.games_for_changes(paths)
+        known = games & self.game_folder_paths.keys()
+        installed = self.refresh_game_folders(games)
+        removed = known - installed
+        if removed:
+            logger.info(f"Games no longer installed: {removed}")
+        if not installed:
+            return None
+        logger.info(f"Syncing changed games: {installed}")
+        try:
+            # One update_shortcuts call per batch, so shortcuts.vdf is written at most once
+            return self.update_shortcuts(installed)
+        finally:
+            self.save_state()
+
+    def watch_library(self, stop_event=None):
+        """Watch the installation directories and the Desktop and sync games as they change."""
+        from GameSync_Watch import HAVE_WATCHDOG, watch
+
+        def on_batch(paths):
+            try:
+                self.sync_changes(paths)
+            except Exception as e:
+                logger.error(f"Error syncing changed games: {e}")
+
+        folders = [(path, True) for path in self.game_installation_paths if os.path.isdir(path)]
+        folders.append((self.desktop_path, False))
+        how = "polling" if self.watch_polling or not HAVE_WATCHDOG else "change notifications"
+        logger.info(
+            f"Watching {len(folders)} folders for changes ({how}); press Ctrl+C to stop."
+        )
+        watch(folders, on_batch, debounce=self.watch_debounce_seconds,
+              poll_interval=self.watch_poll_seconds, native=not self.watch_polling,
+              stop_event=stop_event)
+        logger.info("Stopped watching.")
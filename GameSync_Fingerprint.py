@@ -0,0 +1,108 @@
+"""Install fingerprints, used to recognize a game's exe after its folder moved.
+
+A fingerprint is the size of a file plus a BLAKE2 hash of its first and
+last SAMPLE_BYTES. The file is memory-mapped, so only those two ranges are
+read however large the exe is. Moving a library to another drive or
+renaming a game folder changes the exe's path (and so the appid of its
+shortcut) but not its fingerprint.
+"""
+import os
+import mmap
+import hashlib
+import threading
+
+from GameSync_Store import atomic_write_json, load_json
+
+# Bytes hashed at each end of a file
+SAMPLE_BYTES = 64 * 1024
+
+
+def fingerprint_file(path, sample_bytes=SAMPLE_BYTES):
+    """Return the fingerprint of a file as 'size:hash'.
+
+    Raises OSError if the file cannot be read.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        digest = hashlib.blake2b(digest_size=16)
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                digest.update(data[:sample_bytes])
+                if size > sample_bytes:
+                    digest.update(data[max(sample_bytes, size - sample_bytes):])
+    return f"{size}:{digest.hexdigest()}"
+
+
+def fingerprint_size(fingerprint):
+    """Return the file size recorded in a fingerprint."""
+    return int(fingerprint.split(':', 1)[0])
+
+
+class InstallIndex:
+    """Fingerprints of the exes of the shortcuts this tool created, keyed by appid.
+
+    Each entry records the exe path with its size and mtime when it was
+    fingerprinted, so refreshing an unchanged exe costs one stat and the
+    file is only hashed again after the game was updated. Loaded once and
+    written back with flush().
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._installs = {}
+
+        data = load_json(path)
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._installs = data.get('installs', {})
+
+    def get(self, appid):
+        """Return the entry of an appid ({'exe', 'size', 'mtime', 'fingerprint'}), or None."""
+        with self._lock:
+            entry = self._installs.get(str(appid))
+            return dict(entry) if entry else None
+
+    def update(self, appid, exe_path):
+        """Record the exe of an appid, fingerprinting it if it is new or changed.
+
+        Returns the fingerprint, or None if the exe cannot be read.
+        """
+        try:
+            stat = os.stat(exe_path)
+        except OSError:
+            return None
+        entry = self.get(appid)
+        if (entry and entry['exe'] == exe_path
+                and (entry['size'], entry['mtime']) == (stat.st_size, stat.st_mtime)):
+            return entry['fingerprint']
+        try:
+            fingerprint = fingerprint_file(exe_path)
+        except OSError:
+            return None
+        with self._lock:
+            self._installs[str(appid)] = {
+                'exe': exe_path,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'fingerprint': fingerprint,
+            }
+            self._dirty = True
+        return fingerprint
+
+    def forget(self, appid):
+        """Drop the entry of an appid."""
+        with self._lock:
+            if self._installs.pop(str(appid), None) is not None:
+                self._dirty = True
+
+    def flush(self):
+        """Write the index to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            atomic_write_json(self.path, {'version': self.VERSION, 'installs': self._installs})
+            self._dirty = False
+            return True
@@ -1,12 +1,44 @@
 import os
+import queue
 import threading
+import logging
+import logging.handlers
+from collections import deque
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
+from tkinter import ttk, filedialog, messagebox, scrolledtext
 import subprocess
 import configparser
 import sys
 import webbrowser  # Imported webbrowser module to open URLs
 
+from GameSync_Metrics import format_summary
+
+# Metrics report written when "Profile run" is ticked
+profile_report_file = 'gamesync_profile.json'
+
+# Lines kept in the log view; older lines are dropped
+log_max_lines = 2000
+
+# How often queued events from a run are moved into the window, in milliseconds
+event_poll_ms = 100
+
+# Events posted by worker threads and handled on the Tk thread in batches:
+# log records, ('log', text), ('progress', stage, done, total),
+# ('choose', ambiguous games, reply_queue) and ('done', profile report or None)
+events = queue.Queue()
+
+# The last log_max_lines lines shown in the log view
+log_lines = deque(maxlen=log_max_lines)
+
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Progress bar labels for the stages GameSync_Main reports
+stage_labels = {
+    'scan': "Scanning game folders",
+    'rank': "Choosing executables",
+    'artwork': "Fetching artwork",
+}
+
 # Create a new configuration file if not present
 config_file = 'config.ini'
 
@@ -20,7 +52,52 @@ if not os.path.exists(config_file):
         'desktop_path': ''
     }
     config['SteamGridDB'] = {
-        'api_key': ''
+        'api_key': '',
+        'requests_per_second': '4',
+        'burst': '8',
+        'timeout_seconds': '30',
+        'max_retries': '4'
+    }
+    config['Performance'] = {
+        'max_concurrent_requests': '8',
+        'scan_workers': '8',
+        'checkpoint_seconds': '30',
+        'postprocess_workers': '0'
+    }
+    config['Scan'] = {
+        'max_depth': '8',
+        'max_candidates': '10'
+    }
+    config['Ranking'] = {
+        'size_per_mb': '1',
+        'name_match': '10000',
+        'product_match': '5000',
+        'gui_subsystem': '2000',
+        'console_subsystem': '-2000',
+        'x64': '500',
+        'has_icon': '1000',
+        'helper': '-8000',
+        'not_executable': '-20000'
+    }
+    config['Images'] = {
+        'max_image_mb': '50',
+        'postprocess': 'false',
+        'grid_max_size': '600x900',
+        'hero_max_size': '1920x620',
+        'logo_max_size': '1280x720',
+        'format': 'keep',
+        'quality': '90',
+        'drop_animation': 'true'
+    }
+    config['Cache'] = {
+        'search_ttl_hours': '168',
+        'metadata_ttl_hours': '24',
+        'max_size_mb': '64'
+    }
+    config['Watch'] = {
+        'debounce_seconds': '5',
+        'poll_seconds': '10',
+        'polling': 'false'
     }
     with open(config_file, 'w') as f:
         config.write(f)
@@ -67,196 +144,347 @@ def add_game_directory():
             entry_widgets['game_installation_paths'].insert(tk.END, directory)
 
 
-def run_script(selective=False):
-    """Run the Python script and display real-time logs in the text box, handling interactive input."""
+def post_log(text):
+    """Queue a line of text for the log view; safe to call from any thread."""
+    events.put(('log', text))
 
-    def read_process_output(process):
-        """Read the output from the process and display it in the log box."""
-        while True:
-            output = process.stdout.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                # Update the log text box
-                log_text.insert(tk.END, output)
-                log_text.see(tk.END)  # Auto-scroll to the bottom
-
-                # Check if the script is asking for input
-                if "Please choose one:" in output or "Enter your choice:" in output:
-                    # Prompt the user for input on the main thread
-                    root.after(0, get_user_input, process)
-
-        # Process finished
-        return process.poll()
-
-    def get_user_input(process):
-        """Prompt the user for input and send it to the process."""
-        user_input = simpledialog.askstring("Input Required", "Multiple executables found. Please enter your choice:", parent=root)
-        if user_input is not None:
-            # Send the user input to the process
-            process.stdin.write(user_input + '\n')
-            process.stdin.flush()
-        else:
-            # User canceled; terminate the process
-            process.terminate()
-            log_text.insert(tk.END, "Process terminated by user.\n")
-            log_text.see(tk.END)
 
-    # Save the current config before running the script
-    save_config()
+def append_log(lines):
+    """Add lines to the log view, dropping the oldest beyond log_max_lines."""
+    if not lines:
+        return
+    lines = lines[-log_max_lines:]
+    shown = len(log_lines)
+    overflow = shown + len(lines) - log_max_lines
+    log_lines.extend(lines)
+    if overflow >= shown:
+        # Nothing on screen survives; redraw from the ring buffer
+        log_text.delete(1.0, tk.END)
+        log_text.insert(tk.END, "".join(line + "\n" for line in log_lines))
+    else:
+        if overflow > 0:
+            log_text.delete(1.0, f"{overflow + 1}.0")
+        log_text.insert(tk.END, "".join(line + "\n" for line in lines))
+    log_text.see(tk.END)
+
 
-    # Clear the log box
+def clear_log():
+    """Empty the log view."""
+    log_lines.clear()
     log_text.delete(1.0, tk.END)
 
-    # Prepare the command
-    cmd = [sys.executable, 'GameSync_Main.py']
-    if selective:
-        cmd.append('-s')
 
-    # Run the command as a subprocess and capture stdout and stderr
-    try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                   stdin=subprocess.PIPE, text=True, bufsize=1)
+def show_progress(stage, done, total):
+    """Show how far a stage of the running sync is."""
+    progress_bar.config(maximum=max(total, 1), value=done)
+    progress_label.config(text=f"{stage_labels.get(stage, stage)}: {done}/{total}")
+
 
-        # Read output in a separate thread so the GUI remains responsive
-        threading.Thread(target=read_process_output, args=(process,), daemon=True).start()
+def process_events():
+    """Move queued events into the window in one batch, then check again later.
 
+    Log lines are collected and inserted with a single widget update per
+    batch, so a chatty run does not flood the Tk event loop.
+    """
+    lines = []
+    try:
+        while True:
+            event = events.get_nowait()
+            if isinstance(event, logging.LogRecord):
+                lines.extend(log_formatter.format(event).splitlines())
+            elif event[0] == 'log':
+                lines.extend(event[1].splitlines())
+            else:
+                # Keep the log in order with prompts and the end of the run
+                append_log(lines)
+                lines = []
+                handle_event(event)
+    except queue.Empty:
+        pass
+    append_log(lines)
+    root.after(event_poll_ms, process_events)
+
+
+def handle_event(event):
+    """Handle a progress, prompt or end-of-run event on the Tk thread."""
+    kind = event[0]
+    if kind == 'progress':
+        show_progress(*event[1:])
+    elif kind == 'choose':
+        _, choices, reply = event
+        ask_exe_choices(choices, reply.put)
+    elif kind == 'done':
+        for button in run_buttons:
+            button.config(state=tk.NORMAL)
+        progress_label.config(text="Finished")
+        if event[1]:
+            append_log(format_summary(event[1]))
+
+
+def ask_exe_choices(choices, on_done):
+    """Show all games with several executables in one window.
+
+    Each game gets a drop-down of its candidates, best first, with their
+    sizes. The window does not block the event loop, so the log and the
+    progress of the artwork download keep updating behind it. on_done is
+    called with a dict of game name to chosen exe (None to skip the game).
+    """
+    skip_label = "Skip this game"
+    dialog = tk.Toplevel(root)
+    dialog.title("Choose Executables")
+    dialog.transient(root)
+    ttk.Label(dialog, text=f"Several executables were found for {len(choices)} games. "
+                           "Choose one for each; the other games are added meanwhile.",
+              wraplength=700).pack(padx=10, pady=10, anchor=tk.W)
+
+    # Scrollable list of games, so a long list still fits on screen
+    list_frame = ttk.Frame(dialog)
+    list_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+    canvas = tk.Canvas(list_frame, highlightthickness=0,
+                       height=min(400, 32 * len(choices)), width=750)
+    scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=canvas.yview)
+    rows = ttk.Frame(canvas)
+    rows.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
+    canvas.create_window((0, 0), window=rows, anchor=tk.NW)
+    canvas.configure(yscrollcommand=scrollbar.set)
+    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    selections = []
+    for row, choice in enumerate(choices):
+        labels = [f"{candidate['exe']} ({candidate['size'] / (1024 * 1024):.1f} MB)"
+                  for candidate in choice['candidates']]
+        selected = tk.StringVar(value=labels[0])
+        ttk.Label(rows, text=choice['name']).grid(row=row, column=0, padx=(0, 10), pady=2,
+                                                  sticky=tk.W)
+        ttk.Combobox(rows, textvariable=selected, values=labels + [skip_label],
+                     state='readonly', width=90).grid(row=row, column=1, pady=2, sticky=tk.EW)
+        selections.append((choice, labels, selected))
+
+    def finish(accept):
+        chosen = {}
+        for choice, labels, selected in selections:
+            label = selected.get()
+            chosen[choice['game']] = (choice['candidates'][labels.index(label)]['exe']
+                                      if accept and label in labels else None)
+        dialog.destroy()
+        on_done(chosen)
+
+    buttons = ttk.Frame(dialog)
+    buttons.pack(pady=10)
+    ttk.Button(buttons, text="OK", command=lambda: finish(True)).grid(row=0, column=0, padx=5)
+    ttk.Button(buttons, text="Skip All", command=lambda: finish(False)).grid(row=0, column=1,
+                                                                             padx=5)
+    dialog.protocol("WM_DELETE_WINDOW", lambda: finish(False))
+    dialog.grab_set()
+
+
+def choose_exes_from_worker(choices):
+    """Ask the Tk thread for the exe choices of ambiguous games and wait for the answer."""
+    reply = queue.Queue(maxsize=1)
+    events.put(('choose', choices, reply))
+    return reply.get()
+
+
+def run_engine(selective, profile):
+    """Run one sync with a new SyncEngine in this process; runs on a worker thread.
+
+    The engine reads the config.ini just saved; the libraries it imports
+    are loaded once per GUI session.
+    """
+    handler = logging.handlers.QueueHandler(events)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+    report = None
+    try:
+        from GameSync_Engine import SyncEngine, load_config
+        from GameSync_Metrics import metrics
+
+        engine = SyncEngine(
+            load_config(config_file), selective=selective,
+            progress=lambda *progress: events.put(('progress',) + progress),
+            choose_exes=choose_exes_from_worker,
+        )
+        metrics.reset()
+        try:
+            result = engine.sync()
+        finally:
+            engine.save_state()
+            if profile:
+                report = engine.write_profile_report(profile_report_file)
+        added = sum(len(account['added']) for account in result['accounts'])
+        post_log(f"Game sync process completed: {added} shortcuts added, "
+                 f"{result['artwork']['images_saved']} images saved.")
     except Exception as e:
-        messagebox.showerror("Error", f"Error executing script: {e}")
+        post_log(f"Error running sync: {e}")
+    finally:
+        root_logger.removeHandler(handler)
+        events.put(('done', report))
+
+
+def run_script(selective=False):
+    """Run a sync on a worker thread and show its log and progress as it goes."""
+    # Save the current config before running the script
+    save_config()
+
+    clear_log()
+    progress_bar.config(value=0)
+    progress_label.config(text="Starting...")
+
+    # One run at a time, so two engines never write the same state files
+    for button in run_buttons:
+        button.config(state=tk.DISABLED)
+    threading.Thread(target=run_engine, args=(selective, profile_var.get()), daemon=True).start()
 
 
 def install_requirements():
     """Install required Python packages via pip with spinner feedback."""
     install_status.config(text="🕑", foreground="orange")  # Display spinner during installation
 
+    def set_status(text, color):
+        root.after(0, lambda: install_status.config(text=text, foreground=color))
+
     def install_thread():
         try:
             result = subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], capture_output=True, text=True)
             if result.returncode == 0:
-                install_status.config(text="✔", foreground="green")
-                log_text.insert(tk.END, "Requirements installed successfully.\n")
+                set_status("✔", "green")
+                post_log("Requirements installed successfully.")
             else:
-                install_status.config(text="✖", foreground="red")
-                log_text.insert(tk.END, f"Failed to install requirements:\n{result.stderr}\n")
+                set_status("✖", "red")
+                post_log(f"Failed to install requirements:\n{result.stderr}")
         except Exception as e:
-            install_status.config(text="✖", foreground="red")
-            log_text.insert(tk.END, f"Error installing requirements: {e}\n")
-        finally:
-            log_text.see(tk.END)
+            set_status("✖", "red")
+            post_log(f"Error installing requirements: {e}")
 
     # Run the installation in a separate thread to avoid blocking the UI
     threading.Thread(target=install_thread).start()
 
 
-# Create the main window
-root = tk.Tk()
-root.title("Non-Steam Game Shortcut Automator")
+# Create the main window, only when run as a script: the worker processes of
+# the artwork post-processor import this module again on Windows
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Non-Steam Game Shortcut Automator")
 
-# Set window icon (Steam logo)
-try:
-    # Load the icon image (ensure 'steam_icon.ico' or 'steam_icon.png' is in the same directory)
-    if os.name == 'nt':
-        root.iconbitmap('steam_icon.ico')
-    else:
-        steam_icon = tk.PhotoImage(file='steam_icon.png')
-        root.iconphoto(False, steam_icon)
-except Exception as e:
-    print(f"Could not load icon: {e}")
-
-# Use ttk for modern widgets
-style = ttk.Style(root)
-style.theme_use('clam')  # Use a light theme
-
-# Set custom styles
-style.configure("TButton", padding=6, relief="flat")
-style.configure("TLabel", foreground="#333333", background="#f0f0f0")
-style.configure("TFrame", background="#f0f0f0")
-style.configure("TEntry", fieldbackground="#ffffff", background="#f0f0f0")
-style.configure("TSeparator", background="#f0f0f0")
-style.configure("TScrollbar", background="#f0f0f0")
-style.configure("InstallFrame.TFrame", background="#e0e0e0")
-style.configure("InstallFrame.TLabel", background="#e0e0e0")
-style.configure("InstallFrame.TButton", background="#e0e0e0")
-style.configure("LogFrame.TFrame", background="#f0f0f0")
-style.configure("LogFrame.TLabel", background="#f0f0f0")
-
-entry_widgets = {}
-
-# Set the background color of the root window
-root.configure(background="#f0f0f0")
-
-# Add a label for "Configuration (config.ini):"
-header_label = ttk.Label(root, text="Configuration (config.ini):", font=("Arial", 12, "bold"), style="TLabel")
-header_label.grid(row=0, column=0, columnspan=4, padx=10, pady=(10, 5), sticky=tk.W)
-
-# Create a frame for the configuration inputs
-config_frame = ttk.Frame(root, style="TFrame")
-config_frame.grid(row=1, column=0, columnspan=4, padx=10, pady=5, sticky=tk.EW)
-config_frame.columnconfigure(1, weight=1)
-
-# Create input fields for each configuration option inside the config_frame
-fields = [
-    ("Steam User Data Path", 'steam_user_data_path'),
-    ("Game Installation Paths (comma-separated)", 'game_installation_paths'),
-    ("Steam Directory Path", 'steamdir_path'),
-    ("Desktop Path", 'desktop_path'),
-    ("SteamGridDB API Key", 'api_key')
-]
-
-for i, (label_text, key) in enumerate(fields):
-    ttk.Label(config_frame, text=label_text, style="TLabel").grid(row=i, column=0, padx=5, pady=5, sticky=tk.E)
-    entry = ttk.Entry(config_frame, width=80, style="TEntry")
-    entry.grid(row=i, column=1, padx=5, pady=5, sticky=tk.EW)
-    entry.insert(0, config.get('Paths' if key != 'api_key' else 'SteamGridDB', key))
-    entry_widgets[key] = entry
-    if key == 'api_key':
-        # Add 'Get Key' button next to the API Key entry field
-        ttk.Button(config_frame, text="Get Key", width=18, command=open_api_key_page).grid(row=i, column=2, padx=5, pady=5, sticky=tk.W)
-    elif key != 'game_installation_paths':
-        # Allow browsing for directories (except for game paths)
-        ttk.Button(config_frame, text="Browse", width=18, command=lambda k=key: select_directory(label_text, k)).grid(row=i, column=2, padx=5, pady=5, sticky=tk.W)
-
-# Adjust the width of "Add Game Directory" button to ensure full text is visible
-add_game_button = ttk.Button(config_frame, text="Add Game Directory", width=18, command=add_game_directory)
-add_game_button.grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
-
-# Add a spacer line after config.ini input fields
-ttk.Separator(root, orient='horizontal').grid(row=2, column=0, columnspan=4, pady=10, sticky="ew")
-
-# Create a frame for the Install Requirements section
-install_frame = ttk.Frame(root, style='InstallFrame.TFrame')
-install_frame.grid(row=3, column=0, columnspan=4, padx=10, pady=5, sticky=tk.EW)
-
-# Add the "Install Requirements" button inside install_frame
-ttk.Button(install_frame, text="Install Requirements", command=install_requirements, style="InstallFrame.TButton").grid(row=0, column=0, pady=10, padx=5, sticky=tk.E)
-install_status = ttk.Label(install_frame, text="", font=("Arial", 12), style="InstallFrame.TLabel")
-install_status.grid(row=0, column=1, padx=5, sticky=tk.W)
-
-# Add a spacer line after the Install Requirements section
-ttk.Separator(root, orient='horizontal').grid(row=4, column=0, columnspan=4, pady=10, sticky="ew")
-
-# Add explanation text about automatic vs selective mode
-ttk.Label(root, text="Modes:", font=("Arial", 12, "bold"), style="TLabel").grid(row=5, column=0, columnspan=4, padx=10, sticky=tk.W)
-
-ttk.Label(root, text="Automatic Mode: Runs the script with default settings without prompting for .exe selection.\n"
-                     "Selective Mode: Allows you to manually choose the executable if multiple are found.",
-          wraplength=600, style="TLabel").grid(row=6, column=0, columnspan=4, padx=10, pady=5, sticky=tk.W)
-
-# Add buttons for running the script, centered
-button_frame = ttk.Frame(root, style="TFrame")
-button_frame.grid(row=7, column=0, columnspan=4, pady=10)
-button_frame.columnconfigure(0, weight=1)
-button_frame.columnconfigure(1, weight=1)
-
-ttk.Button(button_frame, text="Run in Automatic Mode", command=lambda: run_script(selective=False)).grid(row=0, column=0, padx=10)
-ttk.Button(button_frame, text="Run in Selective Mode", command=lambda: run_script(selective=True)).grid(row=0, column=1, padx=10)
-
-# Add a scrollable text box to display logs
-log_frame = ttk.Frame(root, style="LogFrame.TFrame")
-log_frame.grid(row=8, column=0, columnspan=4, padx=10, pady=5, sticky=tk.EW)
-log_text = scrolledtext.ScrolledText(log_frame, height=10, wrap=tk.WORD, state="normal", font=("Arial", 10), background="#ffffff")
-log_text.grid(row=0, column=0, sticky=tk.EW)
-log_frame.columnconfigure(0, weight=1)
-
-# Start the GUI loop
-root.mainloop()
+    # Set window icon (Steam logo)
+    try:
+        # Load the icon image (ensure 'steam_icon.ico' or 'steam_icon.png' is in the same directory)
+        if os.name == 'nt':
+            root.iconbitmap('steam_icon.ico')
+        else:
+            steam_icon = tk.PhotoImage(file='steam_icon.png')
+            root.iconphoto(False, steam_icon)
+    except Exception as e:
+        print(f"Could not load icon: {e}")
+
+    # Use ttk for modern widgets
+    style = ttk.Style(root)
+    style.theme_use('clam')  # Use a light theme
+
+    # Set custom styles
+    style.configure("TButton", padding=6, relief="flat")
+    style.configure("TLabel", foreground="#333333", background="#f0f0f0")
+    style.configure("TFrame", background="#f0f0f0")
+    style.configure("TEntry", fieldbackground="#ffffff", background="#f0f0f0")
+    style.configure("TSeparator", background="#f0f0f0")
+    style.configure("TScrollbar", background="#f0f0f0")
+    style.configure("InstallFrame.TFrame", background="#e0e0e0")
+    style.configure("InstallFrame.TLabel", background="#e0e0e0")
+    style.configure("InstallFrame.TButton", background="#e0e0e0")
+    style.configure("LogFrame.TFrame", background="#f0f0f0")
+    style.configure("LogFrame.TLabel", background="#f0f0f0")
+
+    entry_widgets = {}
+
+    # Set the background color of the root window
+    root.configure(background="#f0f0f0")
+
+    # Add a label for "Configuration (config.ini):"
+    header_label = ttk.Label(root, text="Configuration (config.ini):", font=("Arial", 12, "bold"), style="TLabel")
+    header_label.grid(row=0, column=0, columnspan=4, padx=10, pady=(10, 5), sticky=tk.W)
+
+    # Create a frame for the configuration inputs
+    config_frame = ttk.Frame(root, style="TFrame")
+    config_frame.grid(row=1, column=0, columnspan=4, padx=10, pady=5, sticky=tk.EW)
+    config_frame.columnconfigure(1, weight=1)
+
+    # Create input fields for each configuration option inside the config_frame
+    fields = [
+        ("Steam User Data Path", 'steam_user_data_path'),
+        ("Game Installation Paths (comma-separated)", 'game_installation_paths'),
+        ("Steam Directory Path", 'steamdir_path'),
+        ("Desktop Path", 'desktop_path'),
+        ("SteamGridDB API Key", 'api_key')
+    ]
+
+    for i, (label_text, key) in enumerate(fields):
+        ttk.Label(config_frame, text=label_text, style="TLabel").grid(row=i, column=0, padx=5, pady=5, sticky=tk.E)
+        entry = ttk.Entry(config_frame, width=80, style="TEntry")
+        entry.grid(row=i, column=1, padx=5, pady=5, sticky=tk.EW)
+        entry.insert(0, config.get('Paths' if key != 'api_key' else 'SteamGridDB', key))
+        entry_widgets[key] = entry
+        if key == 'api_key':
+            # Add 'Get Key' button next to the API Key entry field
+            ttk.Button(config_frame, text="Get Key", width=18, command=open_api_key_page).grid(row=i, column=2, padx=5, pady=5, sticky=tk.W)
+        elif key != 'game_installation_paths':
+            # Allow browsing for directories (except for game paths)
+            ttk.Button(config_frame, text="Browse", width=18, command=lambda k=key: select_directory(label_text, k)).grid(row=i, column=2, padx=5, pady=5, sticky=tk.W)
+
+    # Adjust the width of "Add Game Directory" button to ensure full text is visible
+    add_game_button = ttk.Button(config_frame, text="Add Game Directory", width=18, command=add_game_directory)
+    add_game_button.grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+
+    # Add a spacer line after config.ini input fields
+    ttk.Separator(root, orient='horizontal').grid(row=2, column=0, columnspan=4, pady=10, sticky="ew")
+
+    # Create a frame for the Install Requirements section
+    install_frame = ttk.Frame(root, style='InstallFrame.TFrame')
+    install_frame.grid(row=3, column=0, columnspan=4, padx=10, pady=5, sticky=tk.EW)
+
+    # Add the "Install Requirements" button inside install_frame
+    ttk.Button(install_frame, text="Install Requirements", command=install_requirements, style="InstallFrame.TButton").grid(row=0, column=0, pady=10, padx=5, sticky=tk.E)
+    install_status = ttk.Label(install_frame, text="", font=("Arial", 12), style="InstallFrame.TLabel")
+    install_status.grid(row=0, column=1, padx=5, sticky=tk.W)
+
+    # Add a spacer line after the Install Requirements section
+    ttk.Separator(root, orient='horizontal').grid(row=4, column=0, columnspan=4, pady=10, sticky="ew")
+
+    # Add explanation text about automatic vs selective mode
+    ttk.Label(root, text="Modes:", font=("Arial", 12, "bold"), style="TLabel").grid(row=5, column=0, columnspan=4, padx=10, sticky=tk.W)
+
+    ttk.Label(root, text="Automatic Mode: Runs the script with default settings without prompting for .exe selection.\n"
+                         "Selective Mode: Allows you to manually choose the executable if multiple are found.",
+              wraplength=600, style="TLabel").grid(row=6, column=0, columnspan=4, padx=10, pady=5, sticky=tk.W)
+
+    # Add buttons for running the script, centered
+    button_frame = ttk.Frame(root, style="TFrame")
+    button_frame.grid(row=7, column=0, columnspan=4, pady=10)
+    button_frame.columnconfigure(0, weight=1)
+    button_frame.columnconfigure(1, weight=1)
+
+    automatic_button = ttk.Button(button_frame, text="Run in Automatic Mode", command=lambda: run_script(selective=False))
+    automatic_button.grid(row=0, column=0, padx=10)
+    selective_button = ttk.Button(button_frame, text="Run in Selective Mode", command=lambda: run_script(selective=True))
+    selective_button.grid(row=0, column=1, padx=10)
+    run_buttons = [automatic_button, selective_button]
+
+    # Option to collect timings and counters for the run
+    profile_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(button_frame, text="Profile run", variable=profile_var).grid(row=0, column=2, padx=10)
+
+    # Add a scrollable text box to display logs
+    log_frame = ttk.Frame(root, style="LogFrame.TFrame")
+    log_frame.grid(row=8, column=0, columnspan=4, padx=10, pady=5, sticky=tk.EW)
+    progress_bar = ttk.Progressbar(log_frame, orient='horizontal', mode='determinate')
+    progress_bar.grid(row=0, column=0, pady=(0, 2), sticky=tk.EW)
+    progress_label = ttk.Label(log_frame, text="", style="LogFrame.TLabel")
+    progress_label.grid(row=1, column=0, pady=(0, 5), sticky=tk.W)
+    log_text = scrolledtext.ScrolledText(log_frame, height=10, wrap=tk.WORD, state="normal", font=("Arial", 10), background="#ffffff")
+    log_text.grid(row=2, column=0, sticky=tk.EW)
+    log_frame.columnconfigure(0, weight=1)
+
+    # Start the GUI loop
+    root.after(event_poll_ms, process_events)
+    root.mainloop()
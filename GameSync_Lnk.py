@@ -0,0 +1,332 @@
+"""Pure-Python reader for Windows shortcut (.lnk) files.
+
+Implements the parts of the Shell Link binary format (MS-SHLLINK) needed to
+find a shortcut's target path, so shortcuts can be resolved without COM and
+on any platform.
+"""
+import os
+import ntpath
+import struct
+import threading
+
+from GameSync_Names import NameIndex, plain_key
+
+LNK_HEADER_SIZE = 0x4C
+LNK_CLSID = bytes.fromhex('0114020000000000c000000000000046')
+
+# LinkFlags
+HAS_LINK_TARGET_ID_LIST = 0x00000001
+HAS_LINK_INFO = 0x00000002
+HAS_NAME = 0x00000004
+HAS_RELATIVE_PATH = 0x00000008
+HAS_WORKING_DIR = 0x00000010
+HAS_ARGUMENTS = 0x00000020
+HAS_ICON_LOCATION = 0x00000040
+IS_UNICODE = 0x00000080
+HAS_EXP_STRING = 0x00000200
+
+# LinkInfoFlags
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x1
+COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX = 0x2
+
+ENVIRONMENT_VARIABLE_DATA_BLOCK = 0xA0000001
+FILE_ENTRY_EXTENSION_SIGNATURE = 0xBEEF0004
+
+
+class LnkParseError(ValueError):
+    """Raised when a file is not a valid Shell Link."""
+
+
+def _read_c_string(data, offset, unicode=False):
+    """Read a NUL-terminated string starting at offset."""
+    if unicode:
+        end = offset
+        while end + 1 < len(data) and data[end:end + 2] != b'\x00\x00':
+            end += 2
+        return data[offset:end].decode('utf-16-le', errors='replace')
+    end = data.find(b'\x00', offset)
+    if end == -1:
+        end = len(data)
+    return data[offset:end].decode('cp1252', errors='replace')
+
+
+def _parse_link_info(data, offset):
+    """Return the target path stored in a LinkInfo structure, or None."""
+    (size, header_size, flags, _volume_id_offset, local_base_path_offset,
+     network_link_offset, common_path_suffix_offset) = struct.unpack_from('<7I', data, offset)
+    info = data[offset:offset + size]
+
+    unicode_offsets = header_size >= 0x24
+    if unicode_offsets:
+        local_base_path_offset_unicode, common_path_suffix_offset_unicode = \
+            struct.unpack_from('<2I', info, 0x1C)
+
+    if unicode_offsets and common_path_suffix_offset_unicode:
+        suffix = _read_c_string(info, common_path_suffix_offset_unicode, unicode=True)
+    else:
+        suffix = _read_c_string(info, common_path_suffix_offset)
+
+    if flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+        if unicode_offsets and local_base_path_offset_unicode:
+            base = _read_c_string(info, local_base_path_offset_unicode, unicode=True)
+        else:
+            base = _read_c_string(info, local_base_path_offset)
+        return ntpath.join(base, suffix) if suffix else base
+
+    if flags & COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX:
+        net_name_offset = struct.unpack_from('<I', info, network_link_offset + 8)[0]
+        net_name = None
+        if net_name_offset > 0x14:
+            net_name_offset_unicode = struct.unpack_from('<I', info, network_link_offset + 0x14)[0]
+            net_name = _read_c_string(info, network_link_offset + net_name_offset_unicode, unicode=True)
+        if not net_name:
+            net_name = _read_c_string(info, network_link_offset + net_name_offset)
+        return ntpath.join(net_name, suffix) if suffix else net_name
+
+    return None
+
+
+def _parse_file_entry_name(item):
+    """Return the name stored in a file entry shell item, preferring the long name."""
+    primary_end = item.find(b'\x00', 14)
+    if primary_end == -1:
+        return None
+    primary = item[14:primary_end].decode('cp1252', errors='replace')
+
+    # The long (Unicode) name lives in the 0xBEEF0004 extension block
+    ext_offset = primary_end + 1
+    if ext_offset % 2:
+        ext_offset += 1
+    while ext_offset + 8 <= len(item):
+        ext_size, ext_version, signature = struct.unpack_from('<HHI', item, ext_offset)
+        if ext_size < 8:
+            break
+        if signature == FILE_ENTRY_EXTENSION_SIGNATURE:
+            name_offset = ext_offset + 18
+            if ext_version >= 7:
+                name_offset += 18
+            if ext_version >= 3:
+                name_offset += 2
+            if ext_version >= 8:
+                name_offset += 4
+            if ext_version >= 9:
+                name_offset += 4
+            if name_offset < ext_offset + ext_size:
+                long_name = _read_c_string(item, name_offset, unicode=True)
+                if long_name:
+                    return long_name
+            break
+        ext_offset += ext_size
+    return primary
+
+
+def _parse_id_list(data, offset, size):
+    """Rebuild a filesystem path from a LinkTargetIDList, or return None."""
+    parts = []
+    end = offset + size
+    while offset + 2 <= end:
+        item_size = struct.unpack_from('<H', data, offset)[0]
+        if item_size == 0:
+            break
+        item = data[offset:offset + item_size]
+        offset += item_size
+        if len(item) < 3:
+            continue
+        item_type = item[2] & 0x70
+        if item_type == 0x20:
+            # Volume item, e.g. "C:\"
+            parts = [_read_c_string(item, 3)]
+        elif item_type == 0x30 and parts:
+            name = _parse_file_entry_name(item)
+            if name:
+                parts.append(name)
+    if not parts:
+        return None
+    return ntpath.join(*parts)
+
+
+def _read_string_data(data, offset, unicode):
+    """Read one counted StringData entry and return (string, next offset)."""
+    count = struct.unpack_from('<H', data, offset)[0]
+    offset += 2
+    if unicode:
+        raw = data[offset:offset + count * 2]
+        return raw.decode('utf-16-le', errors='replace'), offset + count * 2
+    raw = data[offset:offset + count]
+    return raw.decode('cp1252', errors='replace'), offset + count
+
+
+def parse_lnk(data):
+    """Parse the bytes of a .lnk file into a dict of its path-related fields.
+
+    The returned dict has 'target', 'relative_path', 'working_dir',
+    'arguments' and 'icon_location' keys; missing fields are None.
+    """
+    if len(data) < LNK_HEADER_SIZE:
+        raise LnkParseError("File is too small to be a shortcut")
+    header_size = struct.unpack_from('<I', data, 0)[0]
+    if header_size != LNK_HEADER_SIZE or data[4:20] != LNK_CLSID:
+        raise LnkParseError("Missing Shell Link header")
+
+    flags = struct.unpack_from('<I', data, 20)[0]
+    unicode = bool(flags & IS_UNICODE)
+    offset = LNK_HEADER_SIZE
+    result = {
+        'target': None,
+        'relative_path': None,
+        'working_dir': None,
+        'arguments': None,
+        'icon_location': None,
+    }
+
+    try:
+        id_list_target = None
+        if flags & HAS_LINK_TARGET_ID_LIST:
+            id_list_size = struct.unpack_from('<H', data, offset)[0]
+            id_list_target = _parse_id_list(data, offset + 2, id_list_size)
+            offset += 2 + id_list_size
+
+        if flags & HAS_LINK_INFO:
+            link_info_size = struct.unpack_from('<I', data, offset)[0]
+            result['target'] = _parse_link_info(data, offset)
+            offset += link_info_size
+
+        for flag, key in (
+                (HAS_NAME, None),
+                (HAS_RELATIVE_PATH, 'relative_path'),
+                (HAS_WORKING_DIR, 'working_dir'),
+                (HAS_ARGUMENTS, 'arguments'),
+                (HAS_ICON_LOCATION, 'icon_location')):
+            if flags & flag:
+                value, offset = _read_string_data(data, offset, unicode)
+                if key:
+                    result[key] = value
+
+        # Installers often store the target with environment variables only
+        if flags & HAS_EXP_STRING and not result['target']:
+            while offset + 8 <= len(data):
+                block_size, signature = struct.unpack_from('<II', data, offset)
+                if block_size < 8:
+                    break
+                if signature == ENVIRONMENT_VARIABLE_DATA_BLOCK:
+                    target = _read_c_string(data, offset + 268, unicode=True)
+                    if not target:
+                        target = _read_c_string(data, offset + 8)
+                    result['target'] = ntpath.expandvars(target)
+                    break
+                offset += block_size
+    except struct.error as e:
+        raise LnkParseError(f"Truncated shortcut: {e}") from e
+
+    if not result['target']:
+        result['target'] = id_list_target
+    return result
+
+
+def resolve_lnk(lnk_path):
+    """Return the target path of a .lnk file, or None if it has none."""
+    with open(lnk_path, 'rb') as f:
+        info = parse_lnk(f.read())
+    target = info['target']
+    if not target and info['relative_path']:
+        target = ntpath.normpath(
+            ntpath.join(os.path.dirname(lnk_path), info['relative_path'])
+        )
+    return target
+
+
+def normalize_shortcut_name(name):
+    """Normalize a shortcut or game name for lookups (case and spacing)."""
+    return ' '.join(name.lower().split())
+
+
+class DesktopShortcutIndex:
+    """Index of the .lnk files in a folder, keyed by normalized shortcut name.
+
+    The folder is listed again only when its mtime changes. Rewriting a .lnk
+    in place leaves that mtime alone, so every refresh also stats the known
+    .lnk files, and one is parsed again only when its own mtime or size
+    changes. Lookups match names fuzzily, so "Hollow_Knight" finds "Hollow
+    Knight.lnk", but never across editions (see GameSync_Names.plain_key()).
+    """
+
+    def __init__(self, folder, on_error=None):
+        self.folder = folder
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._folder_mtime = None
+        self._entries = {}  # file name -> (mtime_ns, size, target)
+        self._by_name = {}
+        self._name_index = NameIndex(key=plain_key)
+        self.parse_count = 0  # .lnk files parsed so far
+
+    def _entry(self, name, path, stat):
+        """Return the (mtime_ns, size, target) of a .lnk file, parsing it only if it changed."""
+        previous = self._entries.get(name)
+        if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+            return previous
+        self.parse_count += 1
+        try:
+            target = resolve_lnk(path)
+        except (OSError, LnkParseError) as e:
+            if self.on_error:
+                self.on_error(name, e)
+            target = None
+        return (stat.st_mtime_ns, stat.st_size, target)
+
+    def _refresh(self):
+        """Re-list the folder if it changed and re-parse changed shortcuts."""
+        try:
+            folder_mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            self._folder_mtime = None
+            self._entries = {}
+            self._by_name = {}
+            self._name_index = NameIndex(key=plain_key)
+            return
+
+        entries = {}
+        if folder_mtime == self._folder_mtime:
+            for name in self._entries:
+                path = os.path.join(self.folder, name)
+                try:
+                    entries[name] = self._entry(name, path, os.stat(path))
+                except OSError:
+                    continue
+        else:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith('.lnk'):
+                        continue
+                    try:
+                        entries[entry.name] = self._entry(entry.name, entry.path, entry.stat())
+                    except OSError:
+                        continue
+
+        self._folder_mtime = folder_mtime
+        if entries == self._entries:
+            return
+        self._entries = entries
+        self._by_name = {
+            normalize_shortcut_name(name[:-len('.lnk')]): target
+            for name, (_, _, target) in entries.items() if target
+        }
+        self._name_index = NameIndex(self._by_name.items(), key=plain_key)
+
+    def shortcuts(self):
+        """Return a dict of normalized shortcut name to target path."""
+        with self._lock:
+            self._refresh()
+            return self._by_name
+
+    def lookup(self, name):
+        """Return the target of the shortcut closest to this name, or None.
+
+        A shortcut with exactly this (normalized) name wins over fuzzy matches.
+        """
+        with self._lock:
+            self._refresh()
+            target = self._by_name.get(normalize_shortcut_name(name))
+            if target is not None:
+                return target
+            return self._name_index.lookup(name)
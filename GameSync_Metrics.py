@@ -0,0 +1,111 @@
+"""Per-phase timings and counters collected during a sync run."""
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Phases reported even when they did not run, in display order
+PHASES = ('scan', 'rank', 'search', 'metadata', 'download', 'vdf_write')
+
+# Counters reported even when they stayed at zero, in display order
+COUNTERS = (
+    'dirs_visited',
+    'files_statted',
+    'pe_headers_read',
+    'shortcuts_parsed',
+    'http_requests',
+    'throttled_requests',
+    'retried_requests',
+    'coalesced_requests',
+    'bytes_downloaded',
+    'images_linked',
+    'images_copied',
+    'shortcuts_moved',
+    'images_renamed',
+    'cache_hits',
+    'cache_revalidations',
+    'cache_misses',
+    'catalog_hits',
+    'images_processed',
+    'image_bytes_saved',
+)
+
+
+class Metrics:
+    """Thread-safe phase timers and counters.
+
+    Phase times are summed over every call, so a phase that runs on several
+    worker threads at once can add up to more than the run's wall time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all timings and counters and restart the wall clock."""
+        with self._lock:
+            self.seconds = Counter()
+            self.calls = Counter()
+            self.counters = Counter()
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+
+    def count(self, name, amount=1):
+        """Add amount to a counter."""
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one call of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds[name] += elapsed
+                self.calls[name] += 1
+
+    def as_dict(self):
+        """Return the current timings and counters as a JSON-ready dict."""
+        with self._lock:
+            phases = {
+                name: {'seconds': round(self.seconds[name], 6), 'calls': self.calls[name]}
+                for name in list(PHASES) + sorted(set(self.seconds) - set(PHASES))
+            }
+            counters = {name: self.counters[name] for name in COUNTERS}
+            counters.update({name: value for name, value in self.counters.items()
+                             if name not in counters})
+            return {
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z',
+                                            time.localtime(self.started_at)),
+                'wall_seconds': round(time.perf_counter() - self._started, 6),
+                'phases': phases,
+                'counters': counters,
+            }
+
+    def write_report(self, path, extra=None):
+        """Write the metrics, plus any extra top-level keys, as JSON to path."""
+        report = self.as_dict()
+        report.update(extra or {})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def format_summary(report):
+    """Return a short human-readable summary of a metrics report as lines."""
+    lines = [f"Run took {report['wall_seconds']:.2f}s."]
+    for name, phase in report['phases'].items():
+        if phase['calls']:
+            lines.append(f"  {name}: {phase['seconds']:.2f}s over {phase['calls']} calls")
+    for name, value in report['counters'].items():
+        lines.append(f"  {name}: {value}")
+    return lines
+
+
+# Shared by every module of one run
+metrics = Metrics()
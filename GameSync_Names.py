@@ -0,0 +1,236 @@
+"""Game name normalization and a trigram index for fuzzy name lookups.
+
+Folder names, shortcut names, exe names and SteamGridDB titles spell the
+same game in different ways ("Hollow_Knight", "DOOM Eternal",
+"DOOMEternalx64vk", "Final Fantasy VII Remake Intergrade Edition"). Names
+are reduced to a canonical key once; a NameIndex then finds the closest
+key through shared character trigrams, so a lookup only compares against
+names that have something in common with it.
+
+Edition names are dropped only where that cannot pick the wrong game (title
+searches and the catalog). Matching a shortcut or exe to a game uses
+plain_key(), which keeps them, so "Dark Souls Remastered" and "Dark Souls"
+are different games there.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+# Roman numerals as separate words become digits ('i' is left alone; it is
+# far more often a word than a numeral)
+ROMAN_NUMERALS = {
+    'ii': '2', 'iii': '3', 'iv': '4', 'v': '5', 'vi': '6', 'vii': '7',
+    'viii': '8', 'ix': '9', 'x': '10', 'xi': '11', 'xii': '12', 'xiii': '13',
+    'xiv': '14', 'xv': '15', 'xvi': '16',
+}
+
+# Edition suffixes that do not change which game a name refers to
+_EDITION_SUFFIX = re.compile(
+    r'(?:\s+(?:'
+    r'(?:goty|game of the year|definitive|deluxe|complete|enhanced|ultimate|gold|'
+    r'premium|anniversary|collectors|special|digital|standard|legendary|remastered)'
+    r'\s+edition|goty|game of the year|directors cut|remastered|edition))+$'
+)
+
+# Trademark signs, removed before NFKD would turn them into letters
+_SYMBOLS = str.maketrans('', '', '™®©')
+
+# Word boundaries inside CamelCase names
+_CAMEL_CASE = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+
+# Build and platform noise at the end of exe names, e.g. Game-Win64-Shipping
+_EXE_SUFFIX = re.compile(
+    r'(?:x64|x86|win64|win32|64bit|32bit|shipping|vk|vulkan|dx9|dx11|dx12|'
+    r'd3d11|d3d12|opengl|gl|64|32)+$'
+)
+
+# Default similarity a fuzzy match must exceed (Dice coefficient of trigrams)
+DEFAULT_THRESHOLD = 0.8
+
+
+@lru_cache(maxsize=16384)
+def name_tokens(name):
+    """Split a name into normalized words as a tuple.
+
+    Accents, case, punctuation and trademark signs are dropped, CamelCase is
+    split, '&' becomes 'and', Roman numerals become digits and trailing
+    edition names ("GOTY", "Definitive Edition", ...) are removed.
+    """
+    text = unicodedata.normalize('NFKD', name.translate(_SYMBOLS))
+    # Drop accents from Latin letters only; other scripts keep their marks
+    text = unicodedata.normalize('NFC', ''.join(
+        char for i, char in enumerate(text)
+        if not (unicodedata.combining(char) and i and text[i - 1].isascii())
+    ))
+    text = _CAMEL_CASE.sub(' ', text).lower()
+    text = text.replace('&', ' and ').replace("'", '').replace('’', '')
+    text = ' '.join(re.sub(r'[\W_]+', ' ', text).split())
+    stripped = _EDITION_SUFFIX.sub('', text)
+    if stripped:
+        text = stripped
+    return tuple(ROMAN_NUMERALS.get(token, token) for token in text.split())
+
+
+@lru_cache(maxsize=16384)
+def name_key(name):
+    """Return the canonical lookup key of a name, e.g. 'Hollow_Knight' -> 'hollowknight'."""
+    key = ''.join(name_tokens(name))
+    return key or name.strip().lower()
+
+
+@lru_cache(maxsize=16384)
+def plain_key(name):
+    """Return the key of a name ignoring only case, spacing and punctuation.
+
+    Unlike name_key() this keeps edition names and Roman numerals, e.g.
+    'Dark Souls: Remastered' -> 'darksoulsremastered'.
+    """
+    key = re.sub(r'[\W_]+', '', name.lower())
+    return key or name.strip().lower()
+
+
+@lru_cache(maxsize=16384)
+def exe_key(file_name):
+    """Return the lookup key of an exe file name, without extension and build suffixes."""
+    stem = file_name[:-4] if file_name.lower().endswith('.exe') else file_name
+    key = re.sub(r'[\W_]+', '', stem.lower())
+    return _EXE_SUFFIX.sub('', key) or key
+
+
+def name_acronym(name):
+    """Return the initials of a name, keeping numbers, e.g. "Baldur's Gate 3" -> 'bg3'."""
+    return ''.join(token if token.isdigit() else token[0] for token in name_tokens(name))
+
+
+@lru_cache(maxsize=16384)
+def trigrams(key):
+    """Return the set of character trigrams of a key, with its ends marked."""
+    padded = f'^{key}$'
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@lru_cache(maxsize=16384)
+def key_numbers(key):
+    """Return the numbers in a key as a tuple, e.g. 'darksouls3' -> ('3',).
+
+    Roman numerals are digits by then, so "Civilization VI" gives ('6',).
+    """
+    return tuple(re.findall(r'\d+', key))
+
+
+def similarity(key_a, key_b):
+    """Return the Dice coefficient of two keys' trigrams, from 0.0 to 1.0.
+
+    Keys with different numbers are numbered sequels or different entries of
+    a series ("Dark Souls 2" and "Dark Souls 3") and always score 0.0.
+    """
+    if key_a == key_b:
+        return 1.0
+    if key_numbers(key_a) != key_numbers(key_b):
+        return 0.0
+    grams_a, grams_b = trigrams(key_a), trigrams(key_b)
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def exe_matches_game(game_name, exe_file_name):
+    """Return True if an exe's file name refers to the game.
+
+    The exe matches if it contains the game's key, is a large enough part of
+    it, starts with the game's initials (three or more), or is similar
+    enough once build suffixes like x64/Shipping are removed.
+    """
+    game = name_key(game_name)
+    exe = exe_key(exe_file_name)
+    if not game or not exe:
+        return False
+    raw_exe = re.sub(r'[\W_]+', '', exe_file_name.lower())
+    if game in raw_exe:
+        return True
+    if len(exe) >= max(4, len(game) // 2) and exe in game:
+        return True
+    acronym = name_acronym(game_name)
+    if len(acronym) >= 3 and exe.startswith(acronym):
+        return True
+    return similarity(game, exe) > DEFAULT_THRESHOLD
+
+
+def text_mentions_game(game_name, text):
+    """Return True if a free text (e.g. an exe's ProductName) names the game."""
+    game = name_key(game_name)
+    key = name_key(text) if text else ''
+    return bool(game and key) and (game in key or similarity(game, key) > DEFAULT_THRESHOLD)
+
+
+def best_match(name, candidates, threshold=DEFAULT_THRESHOLD):
+    """Return the index of the candidate name closest to name, or None.
+
+    A candidate must score above threshold. Earlier candidates win ties, so
+    a ranked list (like search results) keeps its order among equally good
+    matches.
+    """
+    key = name_key(name)
+    best_index, best_score = None, threshold
+    for index, candidate in enumerate(candidates):
+        score = similarity(key, name_key(candidate))
+        if score > best_score:
+            best_index, best_score = index, score
+            if score == 1.0:
+                break
+    return best_index
+
+
+class NameIndex:
+    """Maps names to values with exact-key and fuzzy trigram lookups.
+
+    A fuzzy lookup counts shared trigrams through an inverted index, so it
+    only touches names that share at least one trigram with the query
+    instead of comparing against every name. Names are reduced with key,
+    name_key() by default.
+    """
+
+    def __init__(self, items=(), key=name_key):
+        self._key = key
+        self._exact = {}
+        self._keys = []
+        self._values = []
+        self._postings = defaultdict(list)
+        for name, value in items:
+            self.add(name, value)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, name, value):
+        """Add a name; the first value added for a key wins exact lookups."""
+        key = self._key(name)
+        self._exact.setdefault(key, value)
+        entry_id = len(self._keys)
+        self._keys.append(key)
+        self._values.append(value)
+        for gram in trigrams(key):
+            self._postings[gram].append(entry_id)
+
+    def lookup(self, name, threshold=DEFAULT_THRESHOLD):
+        """Return the value of the closest name, or None if none is close enough.
+
+        An exact key wins. Otherwise the closest name must score above
+        threshold and have the same numbers as the query (see similarity()).
+        """
+        key = self._key(name)
+        if key in self._exact:
+            return self._exact[key]
+        query = trigrams(key)
+        numbers = key_numbers(key)
+        shared = Counter()
+        for gram in query:
+            shared.update(self._postings.get(gram, ()))
+        best_id, best_score = None, threshold
+        for entry_id, count in shared.items():
+            entry_key = self._keys[entry_id]
+            if key_numbers(entry_key) != numbers:
+                continue
+            score = 2 * count / (len(query) + len(trigrams(entry_key)))
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return None if best_id is None else self._values[best_id]
@@ -0,0 +1,211 @@
+"""Pure-Python reader for the headers of Windows executables (PE files).
+
+Reads only what exe ranking needs: the machine type, the subsystem, whether
+the file has an icon and the ProductName/FileDescription strings of its
+version resource. The file is memory-mapped, so only the pages holding the
+headers and resources are read, however large the executable is.
+"""
+import os
+import mmap
+import struct
+
+# IMAGE_FILE_HEADER.Machine
+MACHINE_NAMES = {0x014C: 'x86', 0x8664: 'x64', 0xAA64: 'arm64'}
+
+# IMAGE_OPTIONAL_HEADER.Subsystem
+SUBSYSTEM_NAMES = {2: 'gui', 3: 'console'}
+
+IMAGE_FILE_DLL = 0x2000
+PE32_MAGIC = 0x10B
+PE32_PLUS_MAGIC = 0x20B
+RESOURCE_DIRECTORY_INDEX = 2
+
+# Resource type ids
+RT_ICON = 3
+RT_GROUP_ICON = 14
+RT_VERSION = 16
+
+# Version resource strings that are kept
+VERSION_STRINGS = {'ProductName': 'product_name', 'FileDescription': 'file_description'}
+
+
+class PEParseError(ValueError):
+    """Raised when a file is not a valid PE executable."""
+
+
+def _align4(offset):
+    return (offset + 3) & ~3
+
+
+def _read_utf16z(data, offset, end):
+    """Read a NUL-terminated UTF-16LE string; return (text, offset after the NUL)."""
+    pos = offset
+    while pos + 1 < end:
+        if data[pos] == 0 and data[pos + 1] == 0:
+            return bytes(data[offset:pos]).decode('utf-16-le', 'replace'), pos + 2
+        pos += 2
+    raise PEParseError("Unterminated string")
+
+
+def _rva_to_offset(sections, rva):
+    """Map a relative virtual address to a file offset using the section table."""
+    for virtual_address, virtual_size, raw_size, raw_offset in sections:
+        if virtual_address <= rva < virtual_address + max(virtual_size, raw_size):
+            return rva - virtual_address + raw_offset
+    raise PEParseError(f"RVA {rva:#x} is outside every section")
+
+
+def _resource_entries(data, base, offset):
+    """Yield (id or None, is_directory, target offset) for one resource directory."""
+    named, ids = struct.unpack_from('<HH', data, base + offset + 12)
+    entry_offset = base + offset + 16
+    for _ in range(named + ids):
+        name, target = struct.unpack_from('<II', data, entry_offset)
+        entry_offset += 8
+        resource_id = None if name & 0x80000000 else name
+        yield resource_id, bool(target & 0x80000000), target & 0x7FFFFFFF
+
+
+def _first_resource_data(data, base, offset, sections, depth=0):
+    """Follow the first entry of each level down to a resource; return (offset, size)."""
+    for _, is_directory, target in _resource_entries(data, base, offset):
+        if is_directory:
+            if depth >= 2:
+                break
+            return _first_resource_data(data, base, target, sections, depth + 1)
+        data_rva, size = struct.unpack_from('<II', data, base + target)
+        return _rva_to_offset(sections, data_rva), size
+    return None
+
+
+def _parse_version_block(data, offset, end):
+    """Parse one VS_VERSIONINFO-style block header.
+
+    Returns (key, value offset, value size in bytes, children offset, block end).
+    """
+    length, value_length, value_type = struct.unpack_from('<HHH', data, offset)
+    block_end = min(offset + length, end)
+    if length < 6:
+        raise PEParseError("Invalid version block length")
+    key, pos = _read_utf16z(data, offset + 6, block_end)
+    value_offset = _align4(pos)
+    value_size = value_length * 2 if value_type == 1 else value_length
+    return key, value_offset, value_size, _align4(value_offset + value_size), block_end
+
+
+def _parse_version_strings(data, offset, size):
+    """Return the wanted strings of a version resource as a dict."""
+    strings = {}
+    end = min(offset + size, len(data))
+    _, _, _, pos, root_end = _parse_version_block(data, offset, end)
+    while pos + 6 <= root_end:
+        key, _, _, table_pos, file_info_end = _parse_version_block(data, pos, root_end)
+        if key == 'StringFileInfo':
+            while table_pos + 6 <= file_info_end:
+                _, _, _, string_pos, table_end = _parse_version_block(
+                    data, table_pos, file_info_end
+                )
+                while string_pos + 6 <= table_end:
+                    name, value_offset, _, _, string_end = _parse_version_block(
+                        data, string_pos, table_end
+                    )
+                    if name in VERSION_STRINGS and VERSION_STRINGS[name] not in strings:
+                        # wValueLength is unreliable in the wild; read up to the NUL
+                        try:
+                            value, _ = _read_utf16z(data, value_offset, string_end)
+                        except PEParseError:
+                            value = ''
+                        if value.strip():
+                            strings[VERSION_STRINGS[name]] = value.strip()
+                    if string_end <= string_pos:
+                        break
+                    string_pos = _align4(string_end)
+                if table_end <= table_pos:
+                    break
+                table_pos = _align4(table_end)
+        if file_info_end <= pos:
+            break
+        pos = _align4(file_info_end)
+    return strings
+
+
+def parse_pe(data):
+    """Parse the headers of a PE file held in a bytes-like object.
+
+    Returns a dict with 'machine' ('x86', 'x64', 'arm64' or None),
+    'subsystem' ('gui', 'console' or None), 'dll', 'has_icon',
+    'product_name' and 'file_description' (None if absent).
+    Raises PEParseError if data is not a PE file.
+    """
+    try:
+        if data[:2] != b'MZ':
+            raise PEParseError("Missing MZ signature")
+        pe_offset = struct.unpack_from('<I', data, 0x3C)[0]
+        if data[pe_offset:pe_offset + 4] != b'PE\0\0':
+            raise PEParseError("Missing PE signature")
+
+        machine, section_count = struct.unpack_from('<HH', data, pe_offset + 4)
+        optional_size, characteristics = struct.unpack_from('<HH', data, pe_offset + 20)
+        optional_offset = pe_offset + 24
+        magic = struct.unpack_from('<H', data, optional_offset)[0]
+        if magic == PE32_MAGIC:
+            directories_offset = optional_offset + 96
+        elif magic == PE32_PLUS_MAGIC:
+            directories_offset = optional_offset + 112
+        else:
+            raise PEParseError(f"Unknown optional header magic {magic:#x}")
+        subsystem = struct.unpack_from('<H', data, optional_offset + 68)[0]
+        directory_count = struct.unpack_from('<I', data, directories_offset - 4)[0]
+
+        info = {
+            'machine': MACHINE_NAMES.get(machine),
+            'subsystem': SUBSYSTEM_NAMES.get(subsystem),
+            'dll': bool(characteristics & IMAGE_FILE_DLL),
+            'has_icon': False,
+            'product_name': None,
+            'file_description': None,
+        }
+        if directory_count <= RESOURCE_DIRECTORY_INDEX:
+            return info
+
+        sections = []
+        section_offset = optional_offset + optional_size
+        for index in range(section_count):
+            virtual_size, virtual_address, raw_size, raw_offset = struct.unpack_from(
+                '<IIII', data, section_offset + index * 40 + 8
+            )
+            sections.append((virtual_address, virtual_size, raw_size, raw_offset))
+
+        resource_rva, resource_size = struct.unpack_from(
+            '<II', data, directories_offset + RESOURCE_DIRECTORY_INDEX * 8
+        )
+        if not resource_rva or not resource_size:
+            return info
+        base = _rva_to_offset(sections, resource_rva)
+
+        for type_id, is_directory, target in _resource_entries(data, base, 0):
+            if type_id in (RT_ICON, RT_GROUP_ICON):
+                info['has_icon'] = True
+            elif type_id == RT_VERSION and is_directory:
+                found = _first_resource_data(data, base, target, sections)
+                if found:
+                    try:
+                        info.update(_parse_version_strings(data, *found))
+                    except (PEParseError, struct.error, IndexError):
+                        pass  # A broken version resource still leaves the rest usable
+        return info
+    except (struct.error, IndexError) as e:
+        raise PEParseError(f"Truncated PE file: {e}")
+
+
+def read_pe_info(path):
+    """Read the PE header facts of an executable file; see parse_pe().
+
+    Raises OSError if the file cannot be read and PEParseError if it is not
+    a PE file.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 0x40:
+            raise PEParseError("File is too small")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_pe(data)
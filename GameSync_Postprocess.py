@@ -0,0 +1,223 @@
+"""Optional post-processing of artwork: downscaling, re-encoding and dropping animation.
+
+Needs the optional Pillow package. Images are decoded and encoded on a
+process pool, so large heroes do not hold up the download threads, and
+every result is cached under the SHA-256 of its source image and the
+settings it was made with: the same source is never processed twice, and
+a source that already fits is remembered as such and not opened again.
+"""
+import os
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from GameSync_Artwork import file_sha256
+from GameSync_Store import atomic_write_json, load_json
+
+try:
+    from PIL import Image
+except ImportError:  # Optional dependency; artwork is saved as downloaded
+    Image = None
+
+# True if images can be post-processed
+HAVE_PILLOW = Image is not None
+
+# Processing settings of one image type. max_size is (width, height) or None
+# for no limit, image_format one of FORMATS or 'keep'.
+ImageSettings = namedtuple(
+    'ImageSettings', ['max_size', 'image_format', 'quality', 'drop_animation']
+)
+
+# Output formats by config name, as Pillow format names
+FORMATS = {'png': 'PNG', 'jpeg': 'JPEG', 'jpg': 'JPEG', 'webp': 'WEBP'}
+
+# File extensions of the formats images can be written in
+EXTENSIONS = {'PNG': '.png', 'JPEG': '.jpg', 'WEBP': '.webp', 'GIF': '.gif'}
+
+
+def parse_max_size(text):
+    """Parse a 'WIDTHxHEIGHT' size; an empty value or 0 means no limit (None)."""
+    text = text.strip().lower()
+    if text in ('', '0'):
+        return None
+    width, _, height = text.partition('x')
+    size = (int(width), int(height))
+    if min(size) <= 0:
+        raise ValueError(f"Invalid image size {text!r}")
+    return size
+
+
+def _has_transparency(image):
+    """Return True if any pixel of an RGBA/LA image is not fully opaque."""
+    return image.getchannel('A').getextrema()[0] < 255
+
+
+def process_image(source_path, target_stem, settings):
+    """Downscale and re-encode one image; runs in a worker process.
+
+    Returns the path of the processed image (target_stem plus the extension
+    of its format), or None if the source already fits the settings or
+    processing would not make it smaller. Animated images are left alone
+    unless drop_animation is set, which keeps only their first frame.
+    JPEG has no transparency, so images with transparent pixels are written
+    as PNG instead.
+    """
+    with Image.open(source_path) as image:
+        animated = getattr(image, 'n_frames', 1) > 1
+        if animated and not settings.drop_animation:
+            return None
+        if settings.image_format == 'keep':
+            image_format = image.format
+        else:
+            image_format = FORMATS[settings.image_format]
+        max_size = settings.max_size
+        too_large = max_size is not None and (
+            image.width > max_size[0] or image.height > max_size[1]
+        )
+        if not (too_large or animated or image_format != image.format):
+            return None
+
+        image.seek(0)
+        if image.mode in ('RGB', 'RGBA', 'L', 'LA'):
+            frame = image.copy()
+        else:
+            has_alpha = 'transparency' in image.info or image.mode.endswith('A')
+            frame = image.convert('RGBA' if has_alpha else 'RGB')
+    if image_format == 'JPEG' and frame.mode in ('RGBA', 'LA'):
+        if _has_transparency(frame):
+            image_format = 'PNG'
+        else:
+            frame = frame.convert('RGB' if frame.mode == 'RGBA' else 'L')
+    extension = EXTENSIONS.get(image_format)
+    if extension is None:
+        return None
+    if too_large:
+        frame.thumbnail(max_size, Image.LANCZOS)
+
+    options = {}
+    if image_format in ('PNG', 'JPEG'):
+        options['optimize'] = True
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.quality
+
+    target_path = target_stem + extension
+    tmp_path = f"{target_path}.tmp"
+    frame.save(tmp_path, image_format, **options)
+    if not (too_large or animated) and os.path.getsize(tmp_path) >= os.path.getsize(source_path):
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, target_path)
+    return target_path
+
+
+class ImageProcessor:
+    """Post-processes images on a process pool, caching the results by source hash.
+
+    Results are kept in folder as '<source sha256>-<settings hash><ext>'. An
+    index records every source processed with the current settings,
+    including those that were left as they are. The pool is started on
+    first use and stopped by close(); it starts again if needed later.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, folder, settings, workers=None):
+        self.folder = folder
+        self.settings = settings
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._pool = None
+        self._inflight = {}
+        os.makedirs(folder, exist_ok=True)
+        self._index_path = os.path.join(folder, self.INDEX_FILE)
+        self._results = load_json(self._index_path, default={}) or {}
+        self._settings_keys = {
+            image_type: hashlib.sha1(repr(tuple(type_settings)).encode('utf-8')).hexdigest()[:12]
+            for image_type, type_settings in settings.items()
+        }
+
+    def submit(self, path, image_type):
+        """Start processing an image; return a Future of the processed path or None."""
+        key = f"{file_sha256(path)}-{self._settings_keys[image_type]}"
+        with self._lock:
+            file_name = self._results.get(key)
+            if file_name is not None:
+                result = os.path.join(self.folder, file_name) if file_name else None
+                if result is None or os.path.exists(result):
+                    future = Future()
+                    future.set_result(result)
+                    return future
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._pool.submit(
+                process_image, path, os.path.join(self.folder, key), self.settings[image_type]
+            )
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._record(key, done))
+        return future
+
+    def _record(self, key, future):
+        """Add a finished result to the index; failures are not remembered."""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            self._results[key] = os.path.basename(result) if result else ''
+            self._dirty = True
+
+    def process(self, path, image_type):
+        """Process an image and wait for it; return the processed path, or None to keep it."""
+        return self.submit(path, image_type).result()
+
+    def prune(self, dry_run=False):
+        """Remove processed images that no grid folder links to any more.
+
+        Like ImageStore.prune(), this also removes results that were copied
+        rather than linked; they are processed again if needed. Returns
+        (file names, bytes reclaimed).
+        """
+        removed, reclaimed = [], 0
+        with self._lock:
+            for key, file_name in list(self._results.items()):
+                if not file_name:
+                    continue
+                path = os.path.join(self.folder, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_nlink > 1:
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    del self._results[key]
+                    self._dirty = True
+                removed.append(file_name)
+                reclaimed += stat.st_size
+        return removed, reclaimed
+
+    def flush(self):
+        """Write the result index if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            atomic_write_json(self._index_path, self._results)
+            self._dirty = False
+            return True
+
+    def close(self):
+        """Stop the worker processes and write the index."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+        self.flush()
@@ -0,0 +1,121 @@
+"""Scores candidate game executables by name, size and PE header facts."""
+import os
+import heapq
+
+from GameSync_Metrics import metrics
+from GameSync_Names import exe_matches_game, text_mentions_game
+from GameSync_PE import PEParseError, read_pe_info
+
+# Points added to an exe's score for each property; [Ranking] in config.ini
+# overrides them. Size counts per MB, so name and header facts outweigh it.
+DEFAULT_WEIGHTS = {
+    'size_per_mb': 1.0,
+    'name_match': 10000.0,
+    'product_match': 5000.0,
+    'gui_subsystem': 2000.0,
+    'console_subsystem': -2000.0,
+    'x64': 500.0,
+    'has_icon': 1000.0,
+    'helper': -8000.0,
+    'not_executable': -20000.0,
+}
+
+# Weights that need the PE headers; if all are zero the headers are never read
+PE_WEIGHTS = ('product_match', 'gui_subsystem', 'console_subsystem', 'x64',
+              'has_icon', 'not_executable')
+
+# Words in an exe's file name or description that mark a helper, not the game
+DEFAULT_HELPER_KEYWORDS = [
+    'crash',
+    'report',
+    'setup',
+    'install',
+    'redist',
+    'update',
+    'helper',
+    'service',
+    'uninst',
+    'prereq',
+    'dotnet',
+]
+
+
+class ExeRanker:
+    """Ranks a game's candidate exes, best first.
+
+    PE header facts come from info_cache (keyed by path, size and mtime)
+    when it has them, so re-ranking unchanged exes reads no files.
+    """
+
+    def __init__(self, weights=None, helper_keywords=DEFAULT_HELPER_KEYWORDS, info_cache=None):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.helper_keywords = [
+            keyword.strip().lower() for keyword in helper_keywords if keyword.strip()
+        ]
+        self.info_cache = info_cache
+        self.read_headers = any(self.weights[name] for name in PE_WEIGHTS)
+
+    def exe_info(self, exe_path, size, mtime):
+        """Return the PE header facts of an exe, or None if it is not a PE executable."""
+        if self.info_cache is not None:
+            entry = self.info_cache.lookup(exe_path, size, mtime)
+            if entry is not None:
+                return entry['info']
+        try:
+            info = read_pe_info(exe_path)
+        except (OSError, PEParseError):
+            info = None
+        metrics.count('pe_headers_read')
+        if self.info_cache is not None:
+            self.info_cache.set(exe_path, size, mtime, info)
+        return info
+
+    def score(self, game_name, exe_path, size, mtime):
+        """Score one exe; higher is better. Launchers lose ties."""
+        weights = self.weights
+        file_name = os.path.basename(exe_path).lower()
+
+        score = size / (1024 * 1024) * weights['size_per_mb']
+        if exe_matches_game(game_name, file_name):
+            score += weights['name_match']
+
+        description = ''
+        if self.read_headers:
+            info = self.exe_info(exe_path, size, mtime)
+            if info is None or info['dll']:
+                score += weights['not_executable']
+            else:
+                if info['subsystem'] == 'gui':
+                    score += weights['gui_subsystem']
+                elif info['subsystem'] == 'console':
+                    score += weights['console_subsystem']
+                if info['machine'] in ('x64', 'arm64'):
+                    score += weights['x64']
+                if info['has_icon']:
+                    score += weights['has_icon']
+                description = (info['file_description'] or '').lower()
+                if (text_mentions_game(game_name, info['product_name'] or '')
+                        or text_mentions_game(game_name, description)):
+                    score += weights['product_match']
+
+        # A helper keyword that is part of the game's own name does not count
+        helper_text = f"{file_name} {description}"
+        if any(keyword in helper_text and keyword not in game_name.lower()
+               for keyword in self.helper_keywords):
+            score += weights['helper']
+
+        return score, 'launcher' not in exe_path.lower()
+
+    def rank(self, game_name, exe_stats, limit=None):
+        """Return the paths of exe_stats (path -> (size, mtime)) best first.
+
+        With a limit, only the best `limit` exes are kept while streaming
+        through the candidates instead of sorting all of them.
+        """
+        def key(exe_path):
+            size, mtime = exe_stats[exe_path]
+            return self.score(game_name, exe_path, size, mtime)
+
+        if limit is not None:
+            return heapq.nlargest(limit, exe_stats, key=key)
+        return sorted(exe_stats, key=key, reverse=True)
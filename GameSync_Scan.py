@@ -0,0 +1,122 @@
+"""Fast discovery of game executables with os.scandir."""
+import os
+import re
+import fnmatch
+from collections import namedtuple
+
+# Folders that hold installers, redistributables or engine tooling, never the game
+DEFAULT_IGNORE_GLOBS = [
+    '_CommonRedist',
+    'CommonRedist',
+    'Redist',
+    'Redistributables',
+    'DirectX',
+    'DXSETUP',
+    'vcredist*',
+    'dotNetFx*',
+    'PhysX',
+    '__Installer',
+    'Installers',
+    'EasyAntiCheat',
+    'BattlEye',
+    'CrashReport*',
+    'Engine/Binaries/ThirdParty',
+    'Engine/Extras',
+]
+
+ScanResult = namedtuple(
+    'ScanResult', ['exes', 'dir_mtimes', 'dirs_visited', 'files_seen', 'files_statted']
+)
+
+
+def compile_ignore_globs(patterns):
+    """Compile folder ignore globs into one case-insensitive matcher.
+
+    A pattern without a slash matches a folder name at any depth. A pattern
+    with a slash matches the folder's path relative to the game folder, at
+    the top or at any depth below it. Returns a function taking that
+    relative path (with forward slashes) and returning True to skip it.
+    """
+    name_patterns = []
+    path_patterns = []
+    for pattern in patterns:
+        pattern = pattern.strip().replace('\\', '/').strip('/')
+        if not pattern:
+            continue
+        if '/' in pattern:
+            path_patterns.append(fnmatch.translate(pattern))
+            path_patterns.append(fnmatch.translate('*/' + pattern))
+        else:
+            name_patterns.append(fnmatch.translate(pattern))
+
+    name_regex = re.compile('|'.join(name_patterns), re.IGNORECASE) if name_patterns else None
+    path_regex = re.compile('|'.join(path_patterns), re.IGNORECASE) if path_patterns else None
+
+    def is_ignored(rel_path):
+        name = rel_path.rsplit('/', 1)[-1]
+        if name_regex and name_regex.match(name):
+            return True
+        return bool(path_regex and path_regex.match(rel_path))
+
+    return is_ignored
+
+
+def is_candidate_exe(file_name):
+    """Return True if a file name looks like a game executable."""
+    lower = file_name.lower()
+    return lower.endswith('.exe') and 'unins' not in lower
+
+
+def scan_exes(game_dir, is_ignored=None, max_depth=None):
+    """Walk a game folder once and collect its candidate executables.
+
+    Directories are walked with os.scandir so type and stat data come from
+    the directory listing where the platform provides it. Ignored folders
+    are pruned before they are entered, and folders deeper than max_depth
+    (the game folder itself is depth 0) are not entered.
+
+    Returns a ScanResult whose exes is a list of (path, size, mtime) and
+    whose dir_mtimes maps every folder visited to its st_mtime_ns, so an
+    exe added in any of them (say a new Binaries/Win64 folder) is seen,
+    plus counts of folders listed, files seen and entries stat'd.
+    Raises OSError if game_dir cannot be read.
+    """
+    exes = []
+    dir_mtimes = {}
+    dirs_visited = 0
+    files_seen = 0
+    files_statted = 1
+
+    stack = [(game_dir, '', 0, os.stat(game_dir).st_mtime_ns)]
+    while stack:
+        path, rel_path, depth, mtime = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            if path == game_dir:
+                raise
+            continue
+        dirs_visited += 1
+        dir_mtimes[path] = mtime
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if max_depth is not None and depth >= max_depth:
+                            continue
+                        child_rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+                        if is_ignored and is_ignored(child_rel):
+                            continue
+                        files_statted += 1
+                        stack.append((entry.path, child_rel, depth + 1,
+                                      entry.stat(follow_symlinks=False).st_mtime_ns))
+                        continue
+                    files_seen += 1
+                    if is_candidate_exe(entry.name):
+                        files_statted += 1
+                        stat = entry.stat()
+                        exes.append((entry.path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue
+
+    return ScanResult(exes, dir_mtimes, dirs_visited, files_seen, files_statted)
@@ -0,0 +1,183 @@
+"""In-memory index over Steam's shortcuts.vdf with safe, change-only writes."""
+import os
+import shutil
+import threading
+
+import vdf
+
+from GameSync_Names import plain_key
+
+
+def normalize_appname(name):
+    """Normalize a shortcut name for lookups, so "Hollow_Knight" finds "Hollow Knight".
+
+    Editions are kept: "Dark Souls Remastered" is not "Dark Souls".
+    """
+    return plain_key(name)
+
+
+def normalize_exe(exe):
+    """Normalize a shortcut exe for lookups (Steam stores it quoted)."""
+    return exe.strip().strip('"').lower()
+
+
+def normalize_appid(appid):
+    """Return an appid as the unsigned decimal string used in grid file names.
+
+    Steam stores the appid as a signed 32-bit int while this tool writes it
+    as a string. Returns None if there is no usable appid.
+    """
+    try:
+        return str(int(appid) & 0xFFFFFFFF)
+    except (TypeError, ValueError):
+        return None
+
+
+def shortcut_appid(shortcut, fallback):
+    """Return a shortcuts.vdf entry's appid; fallback() is used for entries without one."""
+    return normalize_appid(shortcut.get('appid')) or fallback()
+
+
+class ShortcutIndex:
+    """The entries of a shortcuts.vdf file, indexed by name, exe and appid.
+
+    Changes are made in memory and tracked; save() rewrites the file only if
+    something changed, via a temporary file and an atomic rename. The first
+    save rotates copies of the previous file into numbered backups; later
+    saves of the same index (mid-run checkpoints) keep those backups.
+    """
+
+    def __init__(self, path, backups=3):
+        self.path = path
+        self.backups = backups
+        self.dirty = False
+        self._backed_up = False
+        self._lock = threading.RLock()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self._data = vdf.binary_load(f)
+        else:
+            self._data = {'shortcuts': {}}
+        self._data.setdefault('shortcuts', {})
+        self._rebuild()
+
+    @property
+    def shortcuts(self):
+        """The raw key -> entry dict of the shortcuts file."""
+        return self._data['shortcuts']
+
+    def _rebuild(self):
+        """Rebuild the lookup indexes from the raw entries."""
+        self._by_name = {}
+        self._by_exe = {}
+        self._by_appid = {}
+        for key, entry in self.shortcuts.items():
+            self._index(key, entry)
+        self._next_key = 0
+
+    def _index(self, key, entry):
+        """Add an entry to the lookup indexes (the first entry with a value wins)."""
+        name = normalize_appname(entry.get('appname', ''))
+        exe = normalize_exe(entry.get('exe', ''))
+        if name:
+            self._by_name.setdefault(name, key)
+        if exe:
+            self._by_exe.setdefault(exe, key)
+        appid = normalize_appid(entry.get('appid'))
+        if appid:
+            self._by_appid.setdefault(appid, key)
+
+    def _unindex(self, key, entry):
+        """Remove an entry from the lookup indexes."""
+        for index, value in (
+                (self._by_name, normalize_appname(entry.get('appname', ''))),
+                (self._by_exe, normalize_exe(entry.get('exe', ''))),
+                (self._by_appid, normalize_appid(entry.get('appid')))):
+            if value and index.get(value) == key:
+                del index[value]
+
+    def _allocate_key(self):
+        """Return the lowest unused numeric key, so keys never collide after deletions."""
+        while str(self._next_key) in self.shortcuts:
+            self._next_key += 1
+        return str(self._next_key)
+
+    def __len__(self):
+        """Return the number of shortcuts."""
+        return len(self.shortcuts)
+
+    def items(self):
+        """Return a list of (key, entry) pairs."""
+        with self._lock:
+            return list(self.shortcuts.items())
+
+    def find_by_name(self, name):
+        """Return the key of the shortcut with this name, or None."""
+        return self._by_name.get(normalize_appname(name))
+
+    def find_by_exe(self, exe):
+        """Return the key of the shortcut launching this exe, or None."""
+        return self._by_exe.get(normalize_exe(exe))
+
+    def find_by_appid(self, appid):
+        """Return the key of the shortcut with this appid, or None."""
+        return self._by_appid.get(normalize_appid(appid))
+
+    def get(self, key):
+        """Return the entry stored under key, or None."""
+        return self.shortcuts.get(key)
+
+    def add(self, entry):
+        """Add a shortcut entry and return the key it was stored under."""
+        with self._lock:
+            key = self._allocate_key()
+            self.shortcuts[key] = entry
+            self._index(key, entry)
+            self.dirty = True
+            return key
+
+    def update(self, key, **changes):
+        """Change fields of an existing entry."""
+        with self._lock:
+            entry = self.shortcuts[key]
+            if all(entry.get(field) == value for field, value in changes.items()):
+                return
+            self._unindex(key, entry)
+            entry.update(changes)
+            self._index(key, entry)
+            self.dirty = True
+
+    def remove(self, key):
+        """Remove the entry stored under key."""
+        with self._lock:
+            entry = self.shortcuts.pop(key)
+            self._unindex(key, entry)
+            self._next_key = min(self._next_key, int(key)) if key.isdigit() else self._next_key
+            self.dirty = True
+
+    def _rotate_backups(self):
+        """Shift shortcuts.vdf.bak1..N up by one and copy the current file to .bak1."""
+        if not self.backups or not os.path.exists(self.path):
+            return
+        for number in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.bak{number}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.bak{number + 1}")
+        shutil.copy2(self.path, f"{self.path}.bak1")
+
+    def save(self, force=False):
+        """Write the file if it changed; return True if it was written."""
+        with self._lock:
+            if not self.dirty and not force:
+                return False
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                vdf.binary_dump(self._data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            if not self._backed_up:
+                self._rotate_backups()
+                self._backed_up = True
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+            return True
@@ -0,0 +1,388 @@
+"""Small JSON-backed stores that persist state between sync runs."""
+import os
+import json
+import threading
+
+
+def atomic_write_json(path, data):
+    """Write data as JSON to path without ever leaving a half-written file.
+
+    The JSON is written to a temporary file next to the target, flushed to
+    disk and then renamed over the target in one step.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_json(path, default=None):
+    """Load a JSON file, returning default if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class ExeChoiceStore:
+    """Remembers which .exe was chosen for each game.
+
+    The store is read once, queried from memory and written back once with
+    flush(). Each entry records the exe's size and mtime so a moved or
+    updated exe is spotted with a single stat call.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._games = {}
+
+        data = load_json(path)
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._games = data.get('games', {})
+        elif isinstance(data, dict) and data.get('version') == 1:
+            # Automatic picks of version 1 may come from a desktop shortcut of
+            # another numbered game ("Game 2" for "Game 3"); rank those again
+            self._games = {
+                game: entry for game, entry in data.get('games', {}).items()
+                if entry.get('source') == 'selective'
+            }
+            self._dirty = True
+        elif legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    def _import_legacy(self, legacy_path):
+        """Import choices from the old game=exe cache.txt format."""
+        with open(legacy_path, 'r') as f:
+            for line in f:
+                if '=' not in line:
+                    continue
+                game, exe = line.strip().split('=', 1)
+                self._games[game] = {'exe': exe, 'size': None, 'mtime': None,
+                                     'source': 'selective'}
+        self._dirty = bool(self._games)
+
+    def has(self, game_name, sources=None):
+        """Return True if a choice is recorded for a game, without checking the disk."""
+        with self._lock:
+            entry = self._games.get(game_name)
+            return entry is not None and (not sources or entry.get('source') in sources)
+
+    def get(self, game_name, sources=None):
+        """Return the saved exe for a game if it is still unchanged on disk.
+
+        Only choices whose source is in sources are considered (all sources if
+        None). Returns None when there is no usable entry. Entries whose exe
+        has disappeared are dropped, as are automatic picks whose exe changed.
+        """
+        with self._lock:
+            entry = self._games.get(game_name)
+            if entry is None or (sources and entry.get('source') not in sources):
+                return None
+            try:
+                stat = os.stat(entry['exe'])
+            except OSError:
+                del self._games[game_name]
+                self._dirty = True
+                return None
+            if (entry['size'], entry['mtime']) != (stat.st_size, stat.st_mtime):
+                if entry['source'] == 'automatic':
+                    # The exe was updated, so the automatic ranking may differ now
+                    del self._games[game_name]
+                    self._dirty = True
+                    return None
+                # A user's choice stands across game updates (and legacy
+                # entries get their fingerprint filled in on first use)
+                entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime
+                self._dirty = True
+            return entry['exe']
+
+    def set(self, game_name, exe_path, source, size=None, mtime=None):
+        """Record the exe chosen for a game (source is 'selective' or 'automatic')."""
+        if size is None or mtime is None:
+            stat = os.stat(exe_path)
+            size, mtime = stat.st_size, stat.st_mtime
+        with self._lock:
+            self._games[game_name] = {'exe': exe_path, 'size': size,
+                                      'mtime': mtime, 'source': source}
+            self._dirty = True
+
+    def flush(self):
+        """Write the store to disk if anything changed since it was loaded."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            atomic_write_json(self.path, {'version': self.VERSION, 'games': self._games})
+            self._dirty = False
+            return True
+
+
+class ExeInfoCache:
+    """Remembers the PE header facts of each exe, keyed by path, size and mtime.
+
+    An exe whose size or mtime changed is read again; all others are
+    answered from memory, so ranking an unchanged library reads no exe.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._exes = {}
+
+        data = load_json(path)
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._exes = data.get('exes', {})
+
+    def lookup(self, exe_path, size, mtime):
+        """Return the entry ({'size', 'mtime', 'info'}) of an unchanged exe, or None."""
+        with self._lock:
+            entry = self._exes.get(exe_path)
+        if entry is not None and entry['size'] == size and entry['mtime'] == mtime:
+            return entry
+        return None
+
+    def set(self, exe_path, size, mtime, info):
+        """Record the header facts of an exe (None if it is not a PE executable)."""
+        with self._lock:
+            self._exes[exe_path] = {'size': size, 'mtime': mtime, 'info': info}
+            self._dirty = True
+
+    def prune(self, game_dirs):
+        """Forget exes that are not inside any of the given game folders."""
+        prefixes = tuple(os.path.join(game_dir, '') for game_dir in game_dirs)
+        with self._lock:
+            stale = [exe for exe in self._exes if not exe.startswith(prefixes)]
+            for exe in stale:
+                del self._exes[exe]
+            if stale:
+                self._dirty = True
+
+    def flush(self):
+        """Write the cache to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            atomic_write_json(self.path, {'version': self.VERSION, 'exes': self._exes})
+            self._dirty = False
+            return True
+
+
+class LibrarySnapshot:
+    """Persistent snapshot of the game library from the previous run.
+
+    For each installation root it keeps the root's mtime and its game
+    folders. For each game folder it keeps the mtimes of every directory
+    the scan walked, the candidates with their size and mtime, and the exe
+    that was chosen. A folder is walked again only when one of those
+    directory mtimes changed.
+    """
+
+    VERSION = 4
+
+    def __init__(self, path, full_rescan=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._roots = {}
+        self._games = {}
+        self.stats = {'roots_reused': 0, 'roots_rescanned': 0,
+                      'folders_reused': 0, 'folders_rescanned': 0}
+
+        data = load_json(path)
+        if not full_rescan and isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._roots = data.get('roots', {})
+            self._games = data.get('games', {})
+        elif not full_rescan and isinstance(data, dict) and data.get('version') in (2, 3):
+            # Older versions did not watch every folder of a game; walk the games once
+            self._roots = data.get('roots', {})
+            self._dirty = True
+
+    def list_root(self, root):
+        """Return the game folder names in an installation root.
+
+        The root is listed again only if its mtime changed since the snapshot.
+        """
+        root_mtime = os.stat(root).st_mtime_ns
+        with self._lock:
+            entry = self._roots.get(root)
+            if entry and entry['mtime'] == root_mtime:
+                self.stats['roots_reused'] += 1
+                return entry['folders']
+
+        with os.scandir(root) as it:
+            folders = [entry.name for entry in it if entry.is_dir()]
+        with self._lock:
+            self._roots[root] = {'mtime': root_mtime, 'folders': folders}
+            self.stats['roots_rescanned'] += 1
+            self._dirty = True
+        return folders
+
+    def get_game(self, game_dir):
+        """Return the snapshot entry of a game folder if it is still current.
+
+        The entry is a dict with 'exes' (a list of [path, size, mtime]) and
+        'chosen'. Returns None if the folder has to be scanned again.
+        """
+        with self._lock:
+            entry = self._games.get(game_dir)
+        if entry is not None:
+            try:
+                current = all(
+                    os.stat(directory).st_mtime_ns == mtime
+                    for directory, mtime in entry['dirs'].items()
+                )
+            except OSError:
+                current = False
+            if current:
+                with self._lock:
+                    self.stats['folders_reused'] += 1
+                return entry
+        with self._lock:
+            self.stats['folders_rescanned'] += 1
+        return None
+
+    def set_game(self, game_dir, exes, dirs):
+        """Record the candidate exes found by a fresh scan of a game folder.
+
+        exes is a list of [path, size, mtime] and dirs maps every directory
+        the result depends on to its st_mtime_ns.
+        """
+        with self._lock:
+            self._games[game_dir] = {'dirs': dirs, 'exes': exes, 'chosen': None}
+            self._dirty = True
+
+    def set_chosen(self, game_dir, exe_path):
+        """Record which exe was chosen for a game folder."""
+        with self._lock:
+            entry = self._games.get(game_dir)
+            if entry is not None and entry['chosen'] != exe_path:
+                entry['chosen'] = exe_path
+                self._dirty = True
+
+    def prune(self, game_dirs):
+        """Forget game folders that are no longer in the library."""
+        game_dirs = set(game_dirs)
+        with self._lock:
+            stale = [game_dir for game_dir in self._games if game_dir not in game_dirs]
+            for game_dir in stale:
+                del self._games[game_dir]
+            if stale:
+                self._dirty = True
+
+    def summary(self):
+        """Return a one-line summary of how much of the snapshot was reused."""
+        return (
+            f"{self.stats['roots_reused']} installation roots reused, "
+            f"{self.stats['roots_rescanned']} rescanned; "
+            f"{self.stats['folders_reused']} game folders reused, "
+            f"{self.stats['folders_rescanned']} rescanned"
+        )
+
+    def flush(self):
+        """Write the snapshot to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            atomic_write_json(self.path, {'version': self.VERSION,
+                                          'roots': self._roots,
+                                          'games': self._games})
+            self._dirty = False
+            return True
+
+
+class RunJournal:
+    """Append-only journal of a sync run, kept so an interrupted run can be resumed.
+
+    begin() starts a run, record() appends one JSON line per event and
+    finish() deletes the journal once the run is complete, so a journal
+    still on disk when the next run begins belongs to an interrupted run.
+    Lines are flushed as they are written (surviving a crash of the
+    process) and fsynced by sync() (surviving a crash of the machine); a
+    torn last line is ignored when the journal is read back.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def interrupted(self):
+        """Return the records of an unfinished previous run, or None.
+
+        The result has the 'begin' record and the list of 'game' records.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        if (not records or records[0].get('event') != 'begin'
+                or records[0].get('version') != self.VERSION):
+            return None
+        return {
+            'begin': records[0],
+            'games': [record for record in records[1:] if record.get('event') == 'game'],
+        }
+
+    def begin(self, **fields):
+        """Start a new journal, replacing the one of any previous run."""
+        with self._lock:
+            self._close()
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write(dict(fields, event='begin', version=self.VERSION))
+            self._sync()
+
+    def record(self, event, **fields):
+        """Append one event to the journal."""
+        with self._lock:
+            if self._file is not None:
+                self._write(dict(fields, event=event))
+
+    def sync(self):
+        """Force the journal written so far to disk."""
+        with self._lock:
+            self._sync()
+
+    def finish(self):
+        """End a completed run by deleting its journal."""
+        with self._lock:
+            self._close()
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Close the journal of an unfinished run, leaving it on disk."""
+        with self._lock:
+            self._close()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, sort_keys=True) + '\n')
+        self._file.flush()
+
+    def _sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,173 @@
+"""Watch folders for changes and report them in debounced batches.
+
+Native change notifications come from the optional watchdog package
+(ReadDirectoryChangesW on Windows, inotify on Linux, FSEvents on macOS).
+Without it, or if a folder cannot be watched natively, the folders are
+polled instead.
+"""
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Optional dependency; fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+# True if folders can be watched with native change notifications
+HAVE_WATCHDOG = Observer is not None
+
+
+class ChangeBatcher:
+    """Collects changed paths until no new change arrived for `debounce` seconds."""
+
+    def __init__(self, debounce):
+        self.debounce = debounce
+        self._condition = threading.Condition()
+        self._paths = set()
+        self._last_change = None
+
+    def add(self, path):
+        """Record a changed path."""
+        with self._condition:
+            self._paths.add(path)
+            self._last_change = time.monotonic()
+            self._condition.notify_all()
+
+    def wait_batch(self, stop_event):
+        """Block until a batch has settled and return its paths.
+
+        Returns an empty set once stop_event is set.
+        """
+        with self._condition:
+            while not stop_event.is_set():
+                if not self._paths:
+                    self._condition.wait(timeout=0.5)
+                    continue
+                remaining = self._last_change + self.debounce - time.monotonic()
+                if remaining <= 0:
+                    paths, self._paths = self._paths, set()
+                    return paths
+                self._condition.wait(timeout=min(remaining, 0.5))
+        return set()
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards every watchdog event path to a ChangeBatcher."""
+
+    def __init__(self, batcher):
+        super().__init__()
+        self.batcher = batcher
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed', 'closed_no_write'):
+            return
+        self.batcher.add(event.src_path)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.batcher.add(dest_path)
+
+
+def list_folder(folder):
+    """Return a dict of entry path to (mtime_ns, size) for one folder level."""
+    entries = {}
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass
+    return entries
+
+
+class PollingWatcher(threading.Thread):
+    """Lists folders every `interval` seconds and reports the entries that changed.
+
+    Only the top level of each folder is listed. A game folder's own mtime
+    changes when files or folders are added to or removed from it, so an
+    install or uninstall is still seen; changes deeper inside are not.
+    """
+
+    def __init__(self, folders, batcher, interval):
+        super().__init__(daemon=True)
+        self.folders = list(folders)
+        self.batcher = batcher
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._listings = {folder: list_folder(folder) for folder in self.folders}
+
+    def poll(self):
+        """List every folder once and report what changed since the last poll."""
+        for folder in self.folders:
+            listing = list_folder(folder)
+            previous = self._listings[folder]
+            for path in previous.keys() | listing.keys():
+                if previous.get(path) != listing.get(path):
+                    self.batcher.add(path)
+            self._listings[folder] = listing
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_watching(folders, batcher, poll_interval, native=True):
+    """Start watching folders, given as (path, recursive) pairs; return the watchers.
+
+    Every watcher returned has a stop() method. Folders that cannot be
+    watched natively are polled.
+    """
+    watchers = []
+    polled = []
+    observer = Observer() if native and HAVE_WATCHDOG else None
+    handler = _EventHandler(batcher)
+    for folder, recursive in folders:
+        if not os.path.isdir(folder):
+            continue
+        if observer is None:
+            polled.append(folder)
+            continue
+        try:
+            observer.schedule(handler, folder, recursive=recursive)
+        except OSError:
+            polled.append(folder)
+    if observer is not None and observer.emitters:
+        observer.start()
+        watchers.append(observer)
+    if polled:
+        poller = PollingWatcher(polled, batcher, poll_interval)
+        poller.start()
+        watchers.append(poller)
+    return watchers
+
+
+def watch(folders, on_batch, debounce=5.0, poll_interval=10.0, native=True, stop_event=None):
+    """Call on_batch(paths) with each settled batch of changes until stop_event is set.
+
+    folders is a list of (path, recursive) pairs. Runs until interrupted
+    with Ctrl+C when no stop_event is given.
+    """
+    stop_event = stop_event or threading.Event()
+    batcher = ChangeBatcher(debounce)
+    watchers = start_watching(folders, batcher, poll_interval, native=native)
+    try:
+        while not stop_event.is_set():
+            paths = batcher.wait_batch(stop_event)
+            if paths:
+                on_batch(paths)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for watcher in watchers:
+            watcher.stop()
+        for watcher in watchers:
+            watcher.join()
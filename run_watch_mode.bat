@@ -0,0 +1,2 @@
+@echo off
+python "GameSync_Main.py" --watch
\ No newline at end of file